@@ -9,17 +9,21 @@ setup(
         'slate': ['static/*']
     },
     install_requires=[
-        'Flask>=2.0',
-        'Flask-SocketIO>=5.3.0',
+        'fastapi>=0.100.0',
+        'uvicorn>=0.23.0',
         'websockets>=10.0',
         'gym>=0.21.0',
         'opencv-python>=4.5.0',
         'numpy>=1.18.0',
+        'orjson>=3.9.0',
 		'websockets>=15.0.1'
     ],
+    extras_require={
+        'fast': ['uvloop>=0.18.0', 'simplejpeg>=1.6.0', 'watchdog>=3.0.0', 'zstandard>=0.21.0', 'deflate>=0.5.0']
+    },
     entry_points={
         'console_scripts': [
-            'slate=slate.server:Slate'
+            'slate=slate.server:main'
         ],
     },
 )
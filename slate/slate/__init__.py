@@ -1,7 +1,7 @@
 from .slate import SlateClient
 from .agent import Agent
-from .utils import FrameBuffer
+from .utils import FrameBuffer, to_tensor
 from .schemas import frame_payload
 from .video import codec
 
-__all__ = ["SlateClient", "Agent", "FrameBuffer", "frame_payload", "codec"]
\ No newline at end of file
+__all__ = ["SlateClient", "Agent", "FrameBuffer", "to_tensor", "frame_payload", "codec"]
\ No newline at end of file
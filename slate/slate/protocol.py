@@ -0,0 +1,62 @@
+import struct
+from typing import Any
+
+import orjson
+
+from .utils import json_default
+
+
+_RECORD_HEADER = struct.Struct('<II')
+
+
+def pack_message(header: dict[str, Any], body: bytes = b'') -> bytes:
+    """
+    Pack a message into the binary wire format used between the ML runtime and the server
+
+    The header holds the JSON metadata of the message while the body carries
+    raw bytes (e.g. a JPEG frame) that would otherwise have to be base64-encoded
+    inside the JSON.
+
+    Format:
+        [header_len: 4 bytes]
+        [body_len: 4 bytes]
+        [header: header_len bytes of JSON]
+        [body: body_len bytes]
+
+    Args:
+        header: JSON-serialisable message metadata
+        body: raw bytes attached to the message
+
+    Return:
+        byte string containing the packed message
+    """
+    header_bytes = orjson.dumps(header, default=json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return _RECORD_HEADER.pack(len(header_bytes), len(body)) + header_bytes + body
+
+
+def unpack_messages(data: bytes) -> list[tuple[dict[str, Any], bytes]]:
+    """
+    Unpack all messages contained in a binary wire payload
+
+    Args:
+        data: bytes produced by one or more calls to `pack_message`
+
+    Return:
+        list of (header, body) tuples in the order they were packed
+    """
+    messages = []
+    offset = 0
+
+    while offset < len(data):
+        header_len, body_len = _RECORD_HEADER.unpack_from(data, offset)
+        offset += _RECORD_HEADER.size
+
+        header = orjson.loads(data[offset:offset + header_len])
+        offset += header_len
+
+        body = data[offset:offset + body_len]
+        offset += body_len
+
+        messages.append((header, body))
+
+    return messages
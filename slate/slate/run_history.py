@@ -1,56 +1,292 @@
+import base64
+import logging
+import mmap
+import time
 from collections import deque
-from datetime import datetime
-from typing import Any
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+
+def _grow(array: np.ndarray) -> np.ndarray:
+    """
+    Double the capacity of an array along its first axis, keeping its contents
+
+    Args:
+        array: the array to grow
+    
+    Return:
+        a new array with twice the capacity
+    """
+    grown = np.empty((2 * array.shape[0], *array.shape[1:]), dtype=array.dtype)
+    grown[:array.shape[0]] = array
+    return grown
+
+
+def _widen(array: np.ndarray, width: int) -> np.ndarray:
+    """
+    Widen a 2D array to `width` columns, filling the new columns with NaN
+
+    Args:
+        array: the array to widen
+        width: the new number of columns
+    
+    Return:
+        a new array holding the old columns followed by NaN columns
+    """
+    widened = np.full((array.shape[0], width), np.nan, dtype=array.dtype)
+    widened[:, :array.shape[1]] = array
+    return widened
+
+
+def _flat_q_values(q_values: Any) -> np.ndarray:
+    """
+    Flatten the q-values of a frame, e.g. the (1, n) output of a batched model
+
+    Args:
+        q_values: the q-values sent by the ML runtime, possibly nested or None
+    
+    Return:
+        1D float16 array of the q-values, empty if they are missing or can't be stored
+    """
+    if q_values is None:
+        return np.empty(0, dtype=np.float16)
+    try:
+        return np.ravel(np.asarray(q_values, dtype=np.float16))
+    except (TypeError, ValueError):
+        logging.warning("Could not store q-values %.100r, recording them as NaN", q_values)
+        return np.empty(0, dtype=np.float16)
+
+
+class SpilledFrames:
+    """
+    Read-only sequence of JPEG frames stored back to back in a file on disk
+
+    Frames are read through a memory map, so cold runs live in the page cache
+    instead of the server's heap.
+
+    Args:
+        path: the file to write the frames to
+        frames: the frames to spill
+    """
+    def __init__(self, path: Path, frames: list[bytes]):
+        self.path = path
+        self.offsets = np.zeros(len(frames) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, frames), dtype=np.int64, count=len(frames)), out=self.offsets[1:])
+
+        path.write_bytes(b''.join(frames))
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.nbytes else None
+    
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.offsets[-1])
+    
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+    
+
+    def __getitem__(self, idx: int) -> bytes:
+        if not -len(self) <= idx < len(self):
+            raise IndexError("frame index out of range")
+        idx %= len(self)
+        return self._map[self.offsets[idx]:self.offsets[idx + 1]]
+    
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+        self.path.unlink(missing_ok=True)
 
 
 class Recording:
+    INITIAL_CAPACITY = 1024
+
     def __init__(self, uuid: int, data: dict):
         self.run_start_time = datetime.now()
+        self._run_start_ns = time.monotonic_ns()
         self.checkpoint = data['checkpoint']
-        self.frames = []
-        self.total_reward = 0.0
         self.run_id = uuid
-        self.metadata = []
+        self.num_frames = 0
+        # running sum of the positive rewards, kept up to date by `add_frame`
+        self.total_reward = 0.0
+
+        # per-frame data is stored column-wise, numeric columns in preallocated arrays
+        self.frames = []
+        self.rewards = np.empty(self.INITIAL_CAPACITY, dtype=np.float64)
+        self.dones = np.empty(self.INITIAL_CAPACITY, dtype=np.bool_)
+        self.infos = []
+        # q-values only feed the dashboard, so half precision is plenty. Frames can carry
+        # no q-values (e.g. before the first step), so the matrix widens as needed and
+        # `q_counts` keeps the number of q-values each frame actually had
+        self.q_values = np.empty((self.INITIAL_CAPACITY, 0), dtype=np.float16)
+        self.q_counts = np.empty(self.INITIAL_CAPACITY, dtype=np.int64)
+        self.actions = []
+        # nanoseconds since the start of the run, formatted as timestamps only when read
+        self.timesteps = np.empty(self.INITIAL_CAPACITY, dtype=np.int64)
 
         self.add_frame(data)
     
 
     def add_frame(self, data: dict[str, Any]) -> None:
-        self.frames.append(data['frame'])
-        self.total_reward += max(0.0, data['reward'])
-        self.metadata.append({
-            'reward': data['reward'],
-            'done': data['done'],
-            'info': data['info'],
-            'q_values': data['q_values'],
-            'action': data['action'],
-            'timestep': datetime.now().isoformat()
-        })
+        if self.num_frames == self.rewards.shape[0]:
+            self.rewards = _grow(self.rewards)
+            self.dones = _grow(self.dones)
+            self.q_values = _grow(self.q_values)
+            self.q_counts = _grow(self.q_counts)
+            self.timesteps = _grow(self.timesteps)
+
+        # frames are stored as raw JPEG bytes, base64 text frames are decoded and
+        # frameless updates (e.g. a checkpoint selection) are stored as empty frames
+        frame = data['frame'] or b''
+        if isinstance(frame, str):
+            frame = base64.b64decode(frame)
+        self.frames.append(frame)
+
+        self.rewards[self.num_frames] = data['reward']
+        if data['reward'] > 0:
+            self.total_reward += float(data['reward'])
+        self.dones[self.num_frames] = data['done']
+        self.infos.append(data['info'])
+        q_values = _flat_q_values(data['q_values'])
+        q_count = len(q_values)
+        if q_count > self.q_values.shape[1]:
+            self.q_values = _widen(self.q_values, q_count)
+        self.q_values[self.num_frames, :q_count] = q_values
+        self.q_values[self.num_frames, q_count:] = np.nan
+        self.q_counts[self.num_frames] = q_count
+        self.actions.append(data['action'])
+        self.timesteps[self.num_frames] = time.monotonic_ns() - self._run_start_ns
+        self.num_frames += 1
+
+
+    def spill(self, directory: Path) -> None:
+        """
+        Move the frames of the recording to a file in `directory`
+
+        Args:
+            directory: the directory to write the frame file to
+        """
+        self.frames = SpilledFrames(directory / f"run_{self.run_id}.frames", self.frames)
+    
+
+    def close(self) -> None:
+        """
+        Release the frame file of a spilled recording
+        """
+        if isinstance(self.frames, SpilledFrames):
+            self.frames.close()
+    
+
+    def get_frame(self, frame_idx: int) -> dict[str, Any]|None:
+        """
+        Read a single frame and its metadata by direct index into the columns
+
+        Args:
+            frame_idx: index of the frame, out of range indices fall back to the first frame
+        
+        Return:
+            the frame data, or None if the recording has no frames
+        """
+        if not self.num_frames:
+            return None
+        
+        idx = frame_idx if 0 <= frame_idx < self.num_frames else 0
+        return {
+            'frame': self.frames[idx],
+            'reward': float(self.rewards[idx]),
+            'done': bool(self.dones[idx]),
+            'info': self.infos[idx],
+            'q_values': self.q_values[idx, :self.q_counts[idx]].astype(np.float32).tolist(),
+            'action': self.actions[idx],
+            'checkpoint': self.checkpoint
+        }
+
+
+    def get_info(self) -> dict[str, Any]:
+        """
+        Summarise the recording without touching its per-frame data
+
+        Return:
+            the id, start time, length, total reward and checkpoint of the recording
+        """
+        return {
+            'id': self.run_id,
+            'timestamp': self.run_start_time.isoformat(),
+            'total_steps': self.num_frames,
+            'total_reward': self.total_reward,
+            'checkpoint': self.checkpoint
+        }
 
 
     def get_recording(self) -> dict[str, Any]:
+        n = self.num_frames
+        metadata = [
+            {
+                'reward': reward,
+                'done': done,
+                'info': info,
+                'q_values': q_values,
+                'action': action,
+                'timestep': timestep
+            }
+            for reward, done, info, q_values, action, timestep in zip(
+                self.rewards[:n].tolist(),
+                self.dones[:n].tolist(),
+                self.infos,
+                [
+                    q_values[:q_count]
+                    for q_values, q_count in zip(self.q_values[:n].astype(np.float32).tolist(), self.q_counts[:n].tolist())
+                ],
+                self.actions,
+                [
+                    (self.run_start_time + timedelta(microseconds=offset // 1000)).isoformat()
+                    for offset in self.timesteps[:n].tolist()
+                ]
+            )
+        ]
+
         return {
             'id': self.run_id,
             'timestamp': self.run_start_time.isoformat(),
-            'total_steps': len(self.frames),
+            'total_steps': n,
             'total_reward': self.total_reward,
             'checkpoint': self.checkpoint,
             'frames': self.frames,
-            'metadata': self.metadata
+            'metadata': metadata
         }
     
 
 class RunHistory:
-    def __init__(self, max_history_size: int=5) -> None:
+    def __init__(
+            self,
+            max_history_size: int=5,
+            spill_dir: str|Path|None=None,
+            max_spill_bytes: int=2**30
+        ) -> None:
         """
         Args:
             max_history_size: maximum number of records in the history buffer
+            spill_dir: if set, frames of stopped runs are moved to files in this
+                directory and the history is bounded by `max_spill_bytes` instead
+                of `max_history_size`
+            max_spill_bytes: maximum size of the spilled frame files
         """
         self.max_history_size = max_history_size
-        self.run_history = deque(maxlen=max_history_size)
+        self.spill_dir = Path(spill_dir) if spill_dir is not None else None
+        self.max_spill_bytes = max_spill_bytes
+        self.runs: dict[int, Recording] = {}
+        self.run_order: deque[int] = deque()
         self.current_recording = None
-        self.recording_ids = []
         self.recording_num = 1
+        self._metadata_cache: list[dict]|None = None
+        # records an incoming frame, starting a new recording if none is active
+        self.record_frame: Callable[[dict], None] = self.new_recording
     
 
     @property
@@ -59,48 +295,28 @@ class RunHistory:
     
 
     def check_id(self, uuid: int) -> bool:
-        return uuid in self.recording_ids
+        return uuid in self.runs
+    
+
+    def fetch_recording(self, uuid: int) -> dict[str, Any]|None:
+        run = self.runs.get(uuid)
+        return run.get_recording() if run is not None else None
     
 
-    def fetch_recording(self, uuid: int) -> dict[str, Any]:
-        return self.run_history[(uuid-1) % self.max_history_size]
+    def fetch_recording_info(self, uuid: int) -> dict[str, Any]|None:
+        run = self.runs.get(uuid)
+        return run.get_info() if run is not None else None
     
 
     def fetch_recording_frame(self, uuid: int, frame_idx: int) -> dict|None:
-        run = self.run_history[(uuid-1) % self.max_history_size]
-        frames = run.get('frames', [])
-        metadata = run.get('metadata', [])
-        
-        if 0 <= frame_idx < len(frames):
-            frame_metadata = metadata[frame_idx] if frame_idx < len(metadata) else {}
-            return {
-                'frame': frames[frame_idx],
-                'reward': frame_metadata.get('reward', 0.0),
-                'done': frame_metadata.get('done', False),
-                'info': frame_metadata.get('info', {}),
-                'q_values': frame_metadata.get('q_values', []),
-                'action': frame_metadata.get('action', ''),
-                'checkpoint': run.get('checkpoint', '')
-            }
-        else:
-            if len(frames) > 0:
-                first_metadata = metadata[0] if len(metadata) > 0 else {}
-                return {
-                    'frame': frames[0],
-                    'reward': first_metadata.get('reward', 0.0),
-                    'done': first_metadata.get('done', False),
-                    'info': first_metadata.get('info', {}),
-                    'q_values': first_metadata.get('q_values', []),
-                    'action': first_metadata.get('action', ''),
-                    'checkpoint': run.get('checkpoint', '')
-                }
-            return None
+        run = self.runs.get(uuid)
+        return run.get_frame(frame_idx) if run is not None else None
     
 
     def new_recording(self, data: dict) -> None:
         self.current_recording = Recording(self.recording_num, data)
-        self.recording_ids.append(self.recording_num)
         self.recording_num += 1
+        self.record_frame = self.current_recording.add_frame
 
 
     def update_recording(self, data: dict) -> None:
@@ -110,22 +326,43 @@ class RunHistory:
 
     def stop_recording(self) -> None:
         assert self.current_recording, "Cannot call stop_recording - No current recording setup in RunHistory"
-        self.run_history.append(self.current_recording.get_recording())
+        run = self.current_recording
+        if self.spill_dir is not None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            run.spill(self.spill_dir)
+        
+        self.run_order.append(run.run_id)
+        self.runs[run.run_id] = run
         self.current_recording = None
+        self.record_frame = self.new_recording
+        self._metadata_cache = None
 
+        # evict the oldest runs once the history is full, always keeping the newest
+        while len(self.run_order) > 1 and self._is_full():
+            self.runs.pop(self.run_order.popleft()).close()
     
-    def get_run_history(self) -> list[deque]:
-        return list(self.run_history)
+
+    def _is_full(self) -> bool:
+        if self.spill_dir is None:
+            return len(self.run_order) > self.max_history_size
+        return sum(self.runs[uuid].frames.nbytes for uuid in self.run_order) > self.max_spill_bytes
+
+    
+    def get_run_history(self) -> list[dict]:
+        return [self.runs[uuid].get_recording() for uuid in self.run_order]
     
 
     def get_history_metadata(self) -> list[dict]:
-        metadata = []
-        for run in self.run_history:
-            metadata.append({
-                'timestamp': run['timestamp'],
-                'id': run['id'],
-                'total_steps': run['total_steps'],
-                'total_reward': run['total_reward'],
-            })
+        # only stopped runs are listed, so the cache is rebuilt after stop_recording
+        if self._metadata_cache is None:
+            self._metadata_cache = [
+                {
+                    'timestamp': run.run_start_time.isoformat(),
+                    'id': run.run_id,
+                    'total_steps': run.num_frames,
+                    'total_reward': run.total_reward,
+                }
+                for run in map(self.runs.get, self.run_order)
+            ]
         
-        return metadata
+        return self._metadata_cache
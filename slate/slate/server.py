@@ -1,22 +1,29 @@
 from __future__ import annotations
 
+import argparse
 import asyncio
-import json
+import base64
+import hashlib
 import logging
+import time
 import uuid
+from collections import OrderedDict
 from pathlib import Path
-from typing import TypeAlias
+from typing import Any, TypeAlias
 
+import orjson
 import threading
 import uvicorn
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import Response, FileResponse
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, Response
 from fastapi.staticfiles import StaticFiles
+from starlette.types import Scope
 
 from slate.run_history import RunHistory
-from slate.session import Session
+from slate.session import MLOutbox, Session
 from slate.video.codec import encode_video_to_s4
 from slate.router import Router
+from slate.protocol import pack_message, unpack_messages
 
 _PKG_DIR = Path(__file__).parent
 _REPO_STATIC = _PKG_DIR.parent.parent / "server" / "static"
@@ -25,28 +32,100 @@ STATIC_DIR = _REPO_STATIC if _REPO_STATIC.exists() else _PKG_STATIC
 
 sid: TypeAlias = str
 
-ml_clients: set[WebSocket] = set()
+ml_clients: dict[WebSocket, MLOutbox] = {}
 web_clients: dict[WebSocket, sid] = {}
 sessions: dict[sid, Session] = {}
+playback_tasks: dict[sid, asyncio.Task] = {}
+
+ML_SEND_QUEUE_SIZE = 256
+ML_SEND_BATCH_SIZE = 16
+ML_RECEIVE_QUEUE_SIZE = 64
+PLAYBACK_BULK_SIZE = 256
+PLAYBACK_BULK_CACHE_BYTES = 64 * 2**20
+PLAYBACK_FPS = 30
+PLAYBACK_MAX_BUNDLE = 16
+CHECKPOINTS_CACHE_TTL = 5.0
+STATIC_MAX_AGE = 31536000
+
+# last checkpoint list reported by the ML runtime, "ts" is a time.monotonic() stamp
+_checkpoints_cache: dict[str, Any] = {"data": None, "ts": 0.0}
+
+# encoded run_history_update message and the metadata list it was built from
+_history_cache: dict[str, Any] = {"metadata": None, "text": ""}
+
+# packed playback:bulk messages keyed by (run id, first frame), least recently used first
+_bulk_cache: OrderedDict[tuple[int, int], bytes] = OrderedDict()
+_bulk_cache_bytes = 0
+
+# fixed commands are packed once at import time and shared by every ML client
+_ML_COMMANDS: dict[str, bytes] = {
+    cmd: pack_message({"type": cmd})
+    for cmd in ("step", "run", "pause", "reset", "send_checkpoints", "send_run_history")
+}
+
+# commands where repeating the most recently queued copy has no further effect
+_IDEMPOTENT_ML_COMMANDS: frozenset[bytes] = frozenset(
+    _ML_COMMANDS[cmd] for cmd in ("run", "pause", "reset", "send_checkpoints", "send_run_history")
+)
 
 run_history = RunHistory(max_history_size=5)
 
 router = Router()
+ml_router = Router()
+
+class VersionedStaticFiles(StaticFiles):
+    """
+    Static files where versioned URLs (`?v=...`) are cached by the browser
+    for STATIC_MAX_AGE, unversioned URLs keep the default revalidation.
+    """
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = await super().get_response(path, scope)
+        if scope.get("query_string") and response.status_code in (200, 304):
+            response.headers["Cache-Control"] = f"public, max-age={STATIC_MAX_AGE}, immutable"
+        return response
+
 
 app = FastAPI()
-app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
+app.mount("/static", VersionedStaticFiles(directory=str(STATIC_DIR)), name="static")
+
+
+def _asset_versions() -> dict[str, str]:
+    """
+    Version every static file by its modification time
+
+    Returns:
+        mapping of file name to a short version string
+    """
+    return {
+        path.name: format(path.stat().st_mtime_ns, "x")
+        for path in STATIC_DIR.iterdir() if path.is_file()
+    }
 
 
 @app.get("/")
-async def index() -> FileResponse:
+async def index(request: Request) -> Response:
     """
-    Serve the dashboard and request the latest checkpoints from the ML side.
+    Serve the dashboard, checkpoints are requested by the page once it connects.
+
+    Asset links in `index.html` are rewritten to versioned URLs so they can be
+    cached long-term, and the page itself is revalidated through its ETag.
 
+    Args:
+        request: the incoming HTTP request
+    
     Returns:
-        A FastAPI response that serves `index.html` from the resolved static dir.
+        the dashboard HTML, or an empty 304 response if the browser copy is current
     """
-    await _send_to_ml({"type": "send_checkpoints"})
-    return FileResponse(STATIC_DIR / "index.html")
+    versions = _asset_versions()
+    etag = '"' + hashlib.sha1(orjson.dumps(versions, option=orjson.OPT_SORT_KEYS)).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    html = (STATIC_DIR / "index.html").read_text(encoding="utf-8")
+    for name, version in versions.items():
+        html = html.replace(f'"static/{name}"', f'"static/{name}?v={version}"')
+    return HTMLResponse(html, headers=headers)
 
 
 @app.get("/playback/{run_id}")
@@ -61,7 +140,14 @@ async def download_playback(run_id: int) -> Response:
         a response containing the playback file bytes
     """
     run_data = run_history.fetch_recording(int(run_id))
-    video_bytes = encode_video_to_s4(run_data)
+    if run_data is None:
+        raise HTTPException(status_code=404, detail=f"Run ID {run_id} not found.")
+
+    # the S4 format stores frames as base64 text
+    video_bytes = encode_video_to_s4({
+        **run_data,
+        "frames": [base64.b64encode(frame).decode('ascii') for frame in run_data["frames"]]
+    })
     
     return Response(
         content=video_bytes,
@@ -70,6 +156,70 @@ async def download_playback(run_id: int) -> Response:
     )
 
 
+def _dumps(payload: dict) -> str:
+    """
+    Serialise a payload into the JSON text sent over a websocket
+
+    numpy arrays and scalars in the payload are serialised natively by orjson.
+
+    Args:
+        payload: the payload object to serialise
+    
+    Return:
+        JSON string of the payload
+    """
+    return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+
+
+def _playback_error(message: str) -> str:
+    """
+    Encode a playback:error message
+
+    Args:
+        message: the error message shown to the user
+    
+    Return:
+        JSON string of the error message
+    """
+    return _dumps({"type": "playback:error", "message": message})
+
+
+def _playback_eos(cursor: int) -> str:
+    """
+    Encode a playback:eos message
+
+    Args:
+        cursor: the cursor the stream ended at
+    
+    Return:
+        JSON string of the end of stream message
+    """
+    return _dumps({"type": "playback:eos", "cursor": cursor})
+
+
+def _pack_frames(header: dict, frames: list[dict]) -> bytes:
+    """
+    Pack frame payloads into a single binary message for the browser
+
+    The JPEG frames are concatenated into the message body with their sizes
+    listed under `frame_sizes`, so images reach the browser as raw bytes rather
+    than base64 text inside the JSON.
+
+    Args:
+        header: the message fields, e.g. its `type`
+        frames: frame payloads holding the JPEG bytes under `frame`
+
+    Return:
+        the packed message
+    """
+    images = [frame_data['frame'] or b'' for frame_data in frames]
+    metadata = [{key: value for key, value in frame_data.items() if key != 'frame'} for frame_data in frames]
+    return pack_message(
+        {**header, "frames": metadata, "frame_sizes": [len(image) for image in images]},
+        b''.join(images)
+    )
+
+
 def get_session(sid: str) -> Session:
     """
     Get session given an SID
@@ -90,51 +240,110 @@ def get_session(sid: str) -> Session:
     return sess
 
 
-async def _send_to_ml(payload: dict) -> None:
+def _send_to_ml(payload: dict) -> None:
     """
-    Send a JSON payload to all connected ML runtime WebSocket clients.
+    Queue a payload for all connected ML runtime WebSocket clients.
 
     Args:
-        payload: Dictionary that will be JSON-encoded and sent.
+        payload: Dictionary that will be packed and sent.
     """
     if not ml_clients:
         return
-        
-    txt = json.dumps(payload)
-    
-    clients_list = list(ml_clients)
-    
-    results = await asyncio.gather(
-        *(ws.send_text(txt) for ws in clients_list),
-        return_exceptions=True
-    )
+
+    _send_to_ml_bytes(pack_message(payload))
+
+
+def _send_to_ml_bytes(packed: bytes) -> None:
+    """
+    Queue an already packed message for all connected ML runtime WebSocket clients.
+
+    The same bytes are placed on each client's send queue, which is drained
+    by that client's `_ml_sender` task.
+
+    Args:
+        packed: the message bytes produced by `pack_message`
+    """
+    coalesce = packed in _IDEMPOTENT_ML_COMMANDS
+    for outbox in ml_clients.values():
+        if not outbox.put(packed, coalesce):
+            logging.warning("ML send queue is full, dropping message")
+
+
+async def _ml_sender(ws: WebSocket, outbox: MLOutbox) -> None:
+    """
+    Write queued messages to a single ML runtime connection
+
+    Up to `ML_SEND_BATCH_SIZE` messages already waiting in the queue are
+    concatenated and written as one binary websocket message. If a write fails
+    the connection is removed from `ml_clients`, so nothing more is queued for
+    it, and closed so that its handler finishes.
+
+    Args:
+        ws: the websocket connection
+        outbox: the send queue of the connection
+    """
+    try:
+        while True:
+            await ws.send_bytes(await outbox.drain(ML_SEND_BATCH_SIZE))
+    except (WebSocketDisconnect, RuntimeError):
+        # the connection is already closed, its handler cleans up
+        ml_clients.pop(ws, None)
+    except Exception:
+        logging.exception("Sending to the ML runtime failed, closing the connection")
+        ml_clients.pop(ws, None)
+        try:
+            await ws.close()
+        except Exception:
+            pass
+
+
+def _run_history_message() -> str:
+    """
+    Get the encoded run_history_update message
+
+    The message is only re-encoded when RunHistory rebuilds its metadata list,
+    which happens once per stopped run.
+
+    Return:
+        JSON string of the run history message
+    """
+    metadata = run_history.get_history_metadata()
+    if _history_cache["metadata"] is not metadata:
+        _history_cache["metadata"] = metadata
+        _history_cache["text"] = _dumps({"type": "run_history_update", "run_history": metadata})
     
-    disconnected = {
-        ws for ws, result in zip(clients_list, results) 
-        if isinstance(result, Exception)
-    }
-            
-    if disconnected:
-        ml_clients.difference_update(disconnected)
+    return _history_cache["text"]
 
 
 async def _broadcast_to_web(payload: dict) -> None:
     """
     Broadcast data to the UI client via a websocket
 
+    The payload is serialised once and the same text is sent to every client.
+
     Args:
         payload: the payload object to broadcast
     """
-    if not web_clients:
-        return
-    txt = json.dumps(payload)
-    
+    if web_clients:
+        await _broadcast(_dumps(payload))
+
+
+async def _broadcast(message: str|bytes) -> None:
+    """
+    Broadcast an already encoded message to every UI client
+
+    Args:
+        message: JSON text, or a packed binary message
+    """
+    # snapshot the clients, the dict can change while the sends are awaited
+    clients = tuple(web_clients)
+    send = WebSocket.send_bytes if isinstance(message, bytes) else WebSocket.send_text
     results = await asyncio.gather(
-        *(ws.send_text(txt) for ws in web_clients.keys()),
+        *(send(ws, message) for ws in clients),
         return_exceptions=True
     )
     
-    for ws, result in zip(web_clients.keys(), results):
+    for ws, result in zip(clients, results):
         if isinstance(result, Exception):
             web_clients.pop(ws, None)
 
@@ -143,14 +352,25 @@ async def stream_run(session: Session, ws: WebSocket) -> None:
     """
     Start streaming a run to the client
 
-    Handles interrupts from the client such as pausing, ack, etc
+    Handles interrupts from the client such as pausing, ack, etc. While there
+    is no frame to send the stream sleeps until a handler sets `session.wakeup`.
+
+    Frames are sent in bundles of up to `session.window` frames, one message per
+    bundle, and the client acks each bundle once it has played it.
 
     Args:
         session: Session object storing information about the current session
         ws: the websocket connection
     """
-    while True:
-        with session.lock:
+    loop = asyncio.get_running_loop()
+    frame_interval = 1 / PLAYBACK_FPS
+    next_tick = loop.time()
+
+    # the stream is always marked as stopped, even if sending fails, so the session can play again
+    try:
+        while True:
+            session.wakeup.clear()
+            cursors = None
             if not session.streaming:
                 break
 
@@ -159,35 +379,39 @@ async def stream_run(session: Session, ws: WebSocket) -> None:
                 total_steps: int = session.asset.get("total_steps", 0)
                 
                 if cursor >= total_steps:
-                    await ws.send_text(json.dumps({"type": "playback:eos", "cursor": cursor}))
                     session.streaming = False
-                    break
-
-                session.last_sent_cursor = cursor
-                session.cursor += 1
-                session.awaiting_ack = True
+                else:
+                    cursors = range(cursor, min(cursor + session.window, total_steps))
+                    session.last_sent_cursor = cursors[-1]
+                    session.cursor = cursors.stop
+                    session.awaiting_ack = True
+            run_id = session.asset.get("id", 0)
+            streaming = session.streaming
         
-        with session.lock:
-            if not session.streaming:
+            if not streaming:
+                await ws.send_text(_playback_eos(cursor))
                 break
-            paused = session.paused
-            awaiting = session.awaiting_ack
-            last_cursor = session.last_sent_cursor
-            run_id = session.asset.get("id", 0)
         
-        if not paused and awaiting and last_cursor is not None:
-            frame_data = run_history.fetch_recording_frame(run_id, last_cursor)
-            if frame_data:
-                await ws.send_text(json.dumps({"type": "playback:frame", "frame_data": frame_data, "cursor": last_cursor}))
-            else:
-                await ws.send_text(json.dumps({
-                    "type": "playback:error", 
-                    "message": f"No frame could be loaded for cursor {last_cursor}"
-                }))
+            if cursors is None:
+                # paused or waiting on an ack, nothing to do until a handler wakes us
+                await session.wakeup.wait()
+                continue
         
-        await asyncio.sleep(0.1)
-    
-    with session.lock:
+            frames = [run_history.fetch_recording_frame(run_id, idx) for idx in cursors]
+            if not all(frames):
+                # the run has been evicted from the history, nothing more can be streamed
+                await ws.send_text(_playback_error(f"No frame could be loaded for cursors {cursors.start}-{cursors.stop - 1}"))
+                break
+        
+            await ws.send_bytes(_pack_frames(
+                {"type": "playback:frames", "cursors": list(cursors), "interval": frame_interval},
+                frames
+            ))
+        
+            # sleep until the next tick, without bursting to catch up after a stall
+            next_tick = max(next_tick + frame_interval * len(cursors), loop.time())
+            await asyncio.sleep(next_tick - loop.time())
+    finally:
         session.streaming = False
         session.awaiting_ack = False
 
@@ -200,11 +424,19 @@ async def launch_stream(session: Session, ws: WebSocket) -> None:
         session: Session object containing the session information
         ws: the websocket connection
     """
-    with session.lock:
-        if session.streaming:
-            return
-        session.streaming = True
-    asyncio.create_task(stream_run(session, ws))
+    if session.streaming:
+        return
+    session.streaming = True
+    
+    task = asyncio.create_task(stream_run(session, ws))
+    playback_tasks[session.sid] = task
+
+    def _forget(done: asyncio.Task) -> None:
+        # a newer stream may already have replaced this one
+        if playback_tasks.get(session.sid) is done:
+            del playback_tasks[session.sid]
+    
+    task.add_done_callback(_forget)
 
 
 @app.websocket("/ws/ui")
@@ -222,13 +454,21 @@ async def web_handler(ws: WebSocket) -> None:
     try:
         while True:
             msg = await ws.receive_text()
-            data = json.loads(msg)
+            data = orjson.loads(msg)
             msg_type = data.get("type")
             await router.dispatch(msg_type, client_sid, ws, data)
     except WebSocketDisconnect:
         pass
     finally:
         web_clients.pop(ws, None)
+        sess = sessions.pop(client_sid, None)
+        if sess:
+            sess.streaming = False
+            sess.wakeup.set()
+        
+        task = playback_tasks.pop(client_sid, None)
+        if task:
+            task.cancel()
 
 
 @router.on("step")
@@ -245,7 +485,7 @@ async def on_step(
         ws: the websocket connection
         _data: data from the websocket message
     """
-    await _send_to_ml({"type": "step"})
+    _send_to_ml_bytes(_ML_COMMANDS["step"])
 
 
 @router.on("run")
@@ -262,7 +502,7 @@ async def on_run(
         ws: the websocket connection
         _data: data from the websocket message
     """
-    await _send_to_ml({"type": "run"})
+    _send_to_ml_bytes(_ML_COMMANDS["run"])
 
 
 @router.on("pause")
@@ -279,7 +519,7 @@ async def on_pause(
         ws: the websocket connection
         _data: data from the websocket message
     """
-    await _send_to_ml({"type": "pause"})
+    _send_to_ml_bytes(_ML_COMMANDS["pause"])
 
 
 @router.on("reset")
@@ -296,7 +536,7 @@ async def on_reset(
         ws: the websocket connection
         _data: data from the websocket message
     """
-    await _send_to_ml({"type": "reset"})
+    _send_to_ml_bytes(_ML_COMMANDS["reset"])
 
 
 @router.on("select_checkpoint")
@@ -312,7 +552,7 @@ async def on_select_checkpoint(
         ws: the websocket connection
         data: Dict containing a `checkpoint` key with the identifier/path.
     """
-    await _send_to_ml({"type": "select_checkpoint", "checkpoint": data.get("checkpoint", "")})
+    _send_to_ml({"type": "select_checkpoint", "checkpoint": data.get("checkpoint", "")})
 
 
 @router.on("send_checkpoints")
@@ -322,14 +562,19 @@ async def on_send_checkpoints(
     _data: dict|None=None
 ) -> None:
     """
-    Request the list of available checkpoints from the ML runtime.
+    Send the list of available checkpoints, answering from the cache
+    while it is fresh and otherwise requesting it from the ML runtime.
     
     Args:
         sid: the SID of the request
         ws: the websocket connection
         _data: data from the websocket message
     """
-    await _send_to_ml({"type": "send_checkpoints"})
+    checkpoints = _checkpoints_cache["data"]
+    if checkpoints is not None and time.monotonic() - _checkpoints_cache["ts"] < CHECKPOINTS_CACHE_TTL:
+        await ws.send_text(_dumps({"type": "checkpoints_update", "payload": {"checkpoints": checkpoints}}))
+    else:
+        _send_to_ml_bytes(_ML_COMMANDS["send_checkpoints"])
 
 
 @router.on("send_run_history")
@@ -346,7 +591,7 @@ async def on_send_run_history(
         ws: the websocket connection
         _data: data from the websocket message
     """
-    await _send_to_ml({"type": "send_run_history"})
+    _send_to_ml_bytes(_ML_COMMANDS["send_run_history"])
 
 
 @router.on("playback:save")
@@ -366,7 +611,7 @@ async def on_playback_save(
     sess = get_session(sid)
 
     run_id = sess.asset["id"]
-    await ws.send_text(json.dumps({
+    await ws.send_text(_dumps({
         "type": "playback:save:ready", 
         "run_id": run_id, 
         "download_url": f"/playback/{run_id}"
@@ -393,24 +638,18 @@ async def on_playback_load(
 
     run_id = data.get("run_id", 0)
     if run_history.check_id(run_id):
-        await _send_to_ml({"type": "pause"})
-        run_data = run_history.fetch_recording(run_id)
-        run_info = {
-            "id": run_data["id"],
-            "timestamp": run_data["timestamp"],
-            "total_steps": run_data["total_steps"],
-            "total_reward": run_data["total_reward"],
-            "checkpoint": run_data["checkpoint"]
-        }
-        with sess.lock:
-            sess.asset = run_info
-            sess.cursor = 0
-            sess.paused = True
-            sess.awaiting_ack = False
-            sess.last_sent_cursor = None
-        await ws.send_text(json.dumps({"type": "playback:loaded", "payload": run_info}))
+        _send_to_ml_bytes(_ML_COMMANDS["pause"])
+        run_info = run_history.fetch_recording_info(run_id)
+        sess.asset = run_info
+        sess.cursor = 0
+        sess.paused = True
+        sess.awaiting_ack = False
+        sess.last_sent_cursor = None
+        sess.window = 1
+        sess.wakeup.set()
+        await ws.send_text(_dumps({"type": "playback:loaded", "payload": run_info}))
     else:
-        await ws.send_text(json.dumps({"type": "playback:error", "message": f"Run ID {run_id} not found."}))
+        await ws.send_text(_playback_error(f"Run ID {run_id} not found."))
 
 
 @router.on("playback:seek")
@@ -431,23 +670,95 @@ async def on_playback_seek(
 
     cursor = data.get("frame")
     if cursor is None:
-        await ws.send_text(json.dumps({"type": "playback:error", "message": "No frame index provided."}))
+        await ws.send_text(_playback_error("No frame index provided."))
         return
     
     if not (0 <= cursor < sess.asset.get('total_steps', 0)):
-        await ws.send_text(json.dumps({"type": "playback:error", "message": "Frame index out of range."}))
+        await ws.send_text(_playback_error("Frame index out of range."))
         return
     
-    with sess.lock:
-        sess.cursor = cursor
-        sess.awaiting_ack = False
-        sess.last_sent_cursor = None
-        resume_stream = not sess.paused
+    sess.cursor = cursor
+    sess.awaiting_ack = False
+    sess.last_sent_cursor = None
+    sess.window = 1
+    resume_stream = not sess.paused
+    sess.wakeup.set()
     
     if resume_stream:
         await launch_stream(sess, ws)
     
-    await ws.send_text(json.dumps({"type": "playback:seek:ok", "cursor": sess.cursor}))
+    await ws.send_text(_dumps({"type": "playback:seek:ok", "cursor": sess.cursor}))
+
+
+@router.on("playback:bulk")
+async def on_playback_bulk(
+    sid: str, 
+    ws: WebSocket, 
+    data: dict
+) -> None:
+    """
+    Send a range of frames from the loaded playback run in a single message
+
+    Up to `PLAYBACK_BULK_SIZE` frames are packed into one binary websocket
+    message, so the client can cache frames without a round trip per frame.
+    Stopped runs never change, so packed ranges of in-memory runs are kept in
+    a least recently used cache of up to `PLAYBACK_BULK_CACHE_BYTES`. Spilled
+    runs are packed from disk on every request.
+
+    Args:
+        sid: the SID of the request
+        ws: the websocket connection
+        data: data sent from the client - including the first frame to send
+    """
+    sess = get_session(sid)
+
+    run_id = sess.asset.get("id")
+    if run_id is None or not run_history.check_id(run_id):
+        await ws.send_text(_playback_error("No playback run loaded."))
+        return
+
+    start = data.get("start", 0)
+    total_steps = sess.asset.get("total_steps", 0)
+    if (type(start) is not int or start % PLAYBACK_BULK_SIZE
+            or not 0 <= start < max(total_steps, 1)):
+        await ws.send_text(_playback_error("Invalid bulk start frame."))
+        return
+
+    key = (run_id, start)
+    blob = _bulk_cache.get(key)
+    if blob is not None:
+        _bulk_cache.move_to_end(key)
+    else:
+        end = min(start + PLAYBACK_BULK_SIZE, total_steps)
+        frames = [run_history.fetch_recording_frame(run_id, idx) for idx in range(start, end)]
+        blob = _pack_frames({"type": "playback:bulk", "run_id": run_id, "start": start}, frames)
+        if run_history.spill_dir is None:
+            _cache_bulk(key, blob)
+    
+    await ws.send_bytes(blob)
+
+
+def _cache_bulk(key: tuple[int, int], blob: bytes) -> None:
+    """
+    Add a packed playback:bulk message to the cache, evicting least recently used ranges
+
+    Args:
+        key: the (run id, first frame) of the range
+        blob: the packed message
+    """
+    global _bulk_cache_bytes
+
+    # drop ranges of runs that have been evicted from the history
+    for stale in [stale for stale in _bulk_cache if not run_history.check_id(stale[0])]:
+        _bulk_cache_bytes -= len(_bulk_cache.pop(stale))
+    
+    if len(blob) > PLAYBACK_BULK_CACHE_BYTES:
+        return
+    
+    _bulk_cache[key] = blob
+    _bulk_cache_bytes += len(blob)
+    while _bulk_cache_bytes > PLAYBACK_BULK_CACHE_BYTES:
+        _bulk_cache_bytes -= len(_bulk_cache.popitem(last=False)[1])
 
 
 @router.on("playback:pause")
@@ -465,8 +776,9 @@ async def on_playback_pause(
         data: data sent from the client
     """
     sess = get_session(sid)
-    with sess.lock:
-        sess.paused = True
+    sess.paused = True
+    sess.window = 1
+    sess.wakeup.set()
 
 
 @router.on("playback:resume")
@@ -484,8 +796,8 @@ async def on_playback_resume(
         data: data sent from the client
     """
     sess = get_session(sid)
-    with sess.lock:
-        sess.paused = False
+    sess.paused = False
+    sess.wakeup.set()
     
     await launch_stream(sess, ws)
 
@@ -499,18 +811,21 @@ async def on_playback_ack(
     """
     Handler for client ACK messages
 
-    Acknowleges that the previous frame sent in playback mode was received
-    and processed by the client
+    Acknowleges that the previous bundle sent in playback mode was received
+    and processed by the client. The bundle size doubles on every ack, up to
+    `PLAYBACK_MAX_BUNDLE` or the number of frames the client has credit for
 
     Args:
         sid: the SID of the request
         ws: the websocket connection
-        data: data sent from the client
+        data: data sent from the client - optionally including its `credits`
     """
     sess = get_session(sid)
+    credits = max(1, min(data.get("credits", PLAYBACK_MAX_BUNDLE), PLAYBACK_MAX_BUNDLE))
     
-    with sess.lock:
-        sess.awaiting_ack = False
+    sess.awaiting_ack = False
+    sess.window = min(sess.window * 2, credits)
+    sess.wakeup.set()
 
 
 @router.on("get_run_history")
@@ -527,10 +842,106 @@ async def on_get_run_history(
         ws: the websocket connection
         _data: data from the websocket message
     """
-    await ws.send_text(json.dumps({
-        "type": "run_history_update", 
-        "run_history": run_history.get_history_metadata()
-    }))
+    await ws.send_text(_run_history_message())
+
+
+async def _read_ml_messages(ws: WebSocket, inbox: asyncio.Queue) -> None:
+    """
+    Read messages from an ML runtime connection into a queue
+
+    Both text (JSON) and binary (packed) messages are queued as received. A `None`
+    sentinel is queued once the connection is closed. The queue is bounded, so
+    when the browser link is slow the reader stops receiving and TCP backpressure
+    reaches the ML runtime.
+
+    Args:
+        ws: the websocket connection
+        inbox: queue that receives the raw messages
+    """
+    cancelled = False
+    try:
+        while True:
+            message = await ws.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            raw = message.get("bytes")
+            await inbox.put(raw if raw is not None else message.get("text"))
+    except WebSocketDisconnect:
+        pass
+    except asyncio.CancelledError:
+        cancelled = True
+        raise
+    finally:
+        # a cancelled reader has been abandoned by the handler, which no longer drains the queue
+        if not cancelled:
+            await inbox.put(None)
+
+
+def _decode_ml_message(msg: str|bytes) -> list[dict]:
+    """
+    Decode a raw message from the ML runtime
+
+    Text messages are plain JSON. Binary messages hold one or more packed
+    messages, where the body of a frame update is the raw JPEG frame. Either
+    way the frame is placed in the payload as bytes.
+
+    Args:
+        msg: the raw websocket message
+    
+    Return:
+        list of decoded message dictionaries
+    """
+    if isinstance(msg, str):
+        data = orjson.loads(msg)
+        # JSON frame updates carry the frame as base64 text
+        if data.get("type") == "frame_update" and isinstance(data['payload'].get('frame'), str):
+            data['payload']['frame'] = base64.b64decode(data['payload']['frame'])
+        return [data]
+    
+    messages = []
+    for header, body in unpack_messages(msg):
+        if header.get("type") == "frame_update":
+            header['payload']['frame'] = body or None
+        messages.append(header)
+    
+    return messages
+
+
+@ml_router.on("checkpoints_update")
+async def on_ml_checkpoints_update(
+    _sid: str, 
+    ws: WebSocket, 
+    data: dict
+) -> None:
+    """
+    Cache the checkpoint list reported by the ML runtime and forward it to the UI
+
+    Args:
+        _sid: unused, ML messages have no session
+        ws: the ML websocket connection
+        data: the checkpoints_update message
+    """
+    _checkpoints_cache["data"] = data['payload']['checkpoints']
+    _checkpoints_cache["ts"] = time.monotonic()
+    await _broadcast_to_web(data)
+
+
+@ml_router.on("run_completed")
+async def on_ml_run_completed(
+    _sid: str, 
+    ws: WebSocket, 
+    data: dict
+) -> None:
+    """
+    Store the finished recording in the run history and send the new history to the UI
+
+    Args:
+        _sid: unused, ML messages have no session
+        ws: the ML websocket connection
+        data: the run_completed message
+    """
+    run_history.stop_recording()
+    await _broadcast(_run_history_message())
 
 
 @app.websocket("/ws/ml")
@@ -538,45 +949,115 @@ async def ml_handler(ws: WebSocket) -> None:
     """
     Handle a single ML runtime WebSocket connection.
 
-    Adds the connection to the client set and forwards any JSON messages from
-    the ML runtime to the browser via the unified broadcast, using the `type` field 
+    Adds the connection to the client set and forwards any JSON or packed binary
+    messages from the ML runtime to the browser via the unified broadcast, using the `type` field 
     as the event name. Removes the connection on disconnect.
 
+    All messages that are already waiting are drained together, and consecutive
+    `frame_update` payloads are forwarded to the browser as a single `frame_batch`
+    message. When the ML runtime is slow each batch holds a single frame, so no
+    latency is added.
+
     Args:
         ws: The connected WebSocket instance.
     """
     await ws.accept()
-    ml_clients.add(ws)
+    outbox = MLOutbox(maxsize=ML_SEND_QUEUE_SIZE)
+    ml_clients[ws] = outbox
+
+    inbox: asyncio.Queue[str|bytes|None] = asyncio.Queue(maxsize=ML_RECEIVE_QUEUE_SIZE)
+    reader = asyncio.create_task(_read_ml_messages(ws, inbox))
+    sender = asyncio.create_task(_ml_sender(ws, outbox))
+
     try:
-        while True:
-            msg = await ws.receive_text()
-            data = json.loads(msg)
-            msg_type = data.get("type")
+        connected = True
+        while connected:
+            batch = [await inbox.get()]
+            while not inbox.empty():
+                batch.append(inbox.get_nowait())
+
+            messages = []
+            for msg in batch:
+                if msg is None:
+                    connected = False
+                    break
+                messages.extend(_decode_ml_message(msg))
+
+            frames = []
+            for data in messages:
+                msg_type = data.get("type")
+
+                # frames are the hot path, so they are handled inline rather than routed
+                if msg_type == "frame_update":
+                    run_history.record_frame(data['payload'])
+                    frames.append(data['payload'])
+                    continue
+
+                # flush pending frames first so the browser sees messages in order,
+                # frames are only packed when a browser is connected to receive them
+                if frames:
+                    if web_clients:
+                        await _broadcast(_pack_frames({"type": "frame_batch"}, frames))
+                    frames = []
+                
+                await ml_router.dispatch(msg_type, "", ws, data)
             
-            match msg_type:
-                case "frame_update":
-                    if run_history.recording:
-                        run_history.update_recording(data['payload'])
-                    else:
-                        run_history.new_recording(data['payload'])
-                    await _broadcast_to_web(data)
-                    
-                case "checkpoints_update":
-                    await _broadcast_to_web(data)
-                    
-                case "run_completed":
-                    run_history.stop_recording()
-                    await _broadcast_to_web({
-                        "type": "run_history_update", 
-                        "run_history": run_history.get_history_metadata()
-                    })
-                    
-                case _:
-                    logging.warning(f"ML Websocket received unknown message type: {msg_type}")
-    except WebSocketDisconnect:
-        pass
+            if frames and web_clients:
+                await _broadcast(_pack_frames({"type": "frame_batch"}, frames))
     finally:
-        ml_clients.discard(ws)
+        reader.cancel()
+        sender.cancel()
+        ml_clients.pop(ws, None)
+        _checkpoints_cache["data"] = None
+
+
+@app.get("/metrics")
+async def metrics() -> Response:
+    """
+    Report ML send queue statistics in the Prometheus text format
+
+    Returns:
+        a plain text response with one sample per connected ML runtime and the
+        dropped and coalesced message counters
+    """
+    lines = [
+        "# TYPE slate_ml_send_queue_high_watermark gauge",
+        *(
+            f'slate_ml_send_queue_high_watermark{{client="{idx}"}} {outbox.high_watermark}'
+            for idx, outbox in enumerate(ml_clients.values())
+        ),
+        "# TYPE slate_ml_send_queue_dropped_total counter",
+        f"slate_ml_send_queue_dropped_total {MLOutbox.dropped_total}",
+        "# TYPE slate_ml_send_queue_coalesced_total counter",
+        f"slate_ml_send_queue_coalesced_total {MLOutbox.coalesced_total}",
+    ]
+    return Response(content="\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+
+def _server_config(host: str, port: int) -> uvicorn.Config:
+    """
+    Build the uvicorn config shared by the local and standalone servers
+
+    permessage-deflate is disabled since the websocket payloads are mostly JPEG
+    frames, which deflate cannot shrink further, so it only costs CPU on every
+    message. The "auto" loop picks uvloop when it is
+    installed.
+
+    Args:
+        host: HTTP host for the application
+        port: HTTP port for the application
+    
+    Return:
+        the uvicorn server config
+    """
+    return uvicorn.Config(
+        app, 
+        host=host, 
+        port=port, 
+        log_level="info",
+        loop="auto",
+        ws_per_message_deflate=False
+    )
 
 
 def start_local_server(
@@ -590,8 +1071,7 @@ def start_local_server(
         host: HTTP host for the application
         port: HTTP port for the application
     """
-    config = uvicorn.Config(app, host=host, port=port, log_level="info")
-    server = uvicorn.Server(config)
+    server = uvicorn.Server(_server_config(host, port))
     
     # Run the ASGI server in a background thread so it doesn't block 
     # the ML client from launching its own asyncio loop on the main OS thread.
@@ -599,4 +1079,26 @@ def start_local_server(
         target=server.run,
         name="slate-server",
         daemon=True,
-    ).start()
\ No newline at end of file
+    ).start()
+
+
+def main() -> None:
+    """
+    Run the Slate server in the foreground, used by the `slate` console script
+
+    HTTP routes, the UI websocket and the ML websocket all share the single
+    uvicorn event loop.
+    """
+    global run_history
+
+    parser = argparse.ArgumentParser(description="Slate dashboard server")
+    parser.add_argument("--host", default="0.0.0.0", help="HTTP host for the application")
+    parser.add_argument("--port", type=int, default=8000, help="HTTP port for the application")
+    parser.add_argument("--history-dir", help="spill recorded frames to this directory instead of keeping them in memory")
+    parser.add_argument("--history-max-mb", type=int, default=1024, help="disk budget for spilled frames in MiB")
+    args = parser.parse_args()
+
+    if args.history_dir:
+        run_history = RunHistory(spill_dir=args.history_dir, max_spill_bytes=args.history_max_mb * 2**20)
+
+    uvicorn.Server(_server_config(args.host, args.port)).run()
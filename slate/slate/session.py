@@ -1,8 +1,13 @@
-import threading
+import asyncio
 from typing import Any
 
 
 class Session:
+    __slots__ = (
+        "sid", "asset", "cursor", "paused", "awaiting_ack",
+        "streaming", "last_sent_cursor", "window", "wakeup"
+    )
+
     def __init__(self, sid: str):
         self.sid: str = sid
         self.asset: dict[str, Any] = {}
@@ -11,4 +16,72 @@ class Session:
         self.awaiting_ack: bool = False
         self.streaming: bool = False
         self.last_sent_cursor: int | None = None
-        self.lock = threading.Lock()
\ No newline at end of file
+        self.window: int = 1
+        # session state is only touched from the server's event loop, so no lock is needed.
+        # set whenever the playback state changes so a waiting stream re-checks it
+        self.wakeup = asyncio.Event()
+
+
+class MLOutbox:
+    """
+    Bounded send queue for a single ML runtime connection
+
+    Applies backpressure when the ML runtime falls behind: once the queue is
+    full new messages are dropped, and repeated idempotent commands are
+    coalesced into the copy that is already waiting.
+
+    Args:
+        maxsize: maximum number of queued messages
+    """
+    dropped_total: int = 0
+    coalesced_total: int = 0
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=maxsize)
+        self.high_watermark: int = 0
+        self._last_queued: bytes | None = None
+
+
+    def put(self, packed: bytes, coalesce: bool = False) -> bool:
+        """
+        Queue a packed message without blocking
+
+        Args:
+            packed: the message bytes
+            coalesce: skip the message if it repeats the most recently queued message
+
+        Returns:
+            False if the message was dropped because the queue is full
+        """
+        if coalesce and packed is self._last_queued:
+            MLOutbox.coalesced_total += 1
+            return True
+
+        try:
+            self.queue.put_nowait(packed)
+        except asyncio.QueueFull:
+            MLOutbox.dropped_total += 1
+            return False
+
+        self._last_queued = packed
+        self.high_watermark = max(self.high_watermark, self.queue.qsize())
+        return True
+
+
+    async def drain(self, limit: int) -> bytes:
+        """
+        Wait for at least one message and take up to `limit` queued messages
+
+        Args:
+            limit: maximum number of messages to take
+
+        Returns:
+            the taken messages concatenated in order
+        """
+        batch = [await self.queue.get()]
+        while len(batch) < limit and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+
+        if self.queue.empty():
+            self._last_queued = None
+        return b''.join(batch)
@@ -1,16 +1,40 @@
 import asyncio
-import json
-import base64
+import bisect
+from concurrent.futures import ThreadPoolExecutor
 import cv2
 import websockets
 import threading
 import os
+import sys
+import time
 import numpy as np
+import orjson
 from datetime import datetime
 from torch import Tensor
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+try:
+    import simplejpeg
+except ImportError:
+    simplejpeg = None
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
 from .agent import Agent
-from .utils import NumpyEncoder
+from .protocol import pack_message, unpack_messages
+
+
+# Frames the run loop may queue ahead of the socket before it waits for the writer
+MAX_PENDING_SENDS = 4
 
 
 class SlateClient:
@@ -25,9 +49,13 @@ class SlateClient:
         run_local: whether to run the slate server locally or connect to a cloud server
         frame_rate: Delay (in seconds) between steps during continuous run
         checkpoints_dir: the directory which the agent checkpoints are stored
+        jpeg_quality: JPEG quality (0-100) of the frames sent to the dashboard, 95 matches OpenCV's default
+        max_frame_size: if set, frames whose longest side exceeds this many pixels are
+            downscaled before they are encoded
+        recording_dir: if set, recordings are streamed to a file in this directory
 
     Attributes:
-        current_frame: Base64-encoded JPEG of the latest environment render
+        current_frame: JPEG bytes of the latest environment render
         q_values: List of Q-values returned by the agent
         reward: Latest reward obtained
         done: Boolean indicating whether the last episode ended
@@ -42,15 +70,25 @@ class SlateClient:
             endpoint: str|None = None,
             run_local: bool = False,
             frame_rate: float=0.1,
-            checkpoints_dir: str = ""
+            checkpoints_dir: str = "",
+            jpeg_quality: int = 95,
+            max_frame_size: int|None = None,
+            recording_dir: str = ""
         ) -> None:
         self.env = env
         self.agent = agent
         self.frame_rate = frame_rate
+        self.jpeg_quality = jpeg_quality
+        self.max_frame_size = max_frame_size
         self.running = False
         self.step_mode = False
         self.state_lock = threading.Lock()
         self.loop_task = None
+        self.outbox: asyncio.Queue[bytes] | None = None
+        self._outbox_drained = asyncio.Event()
+        self._connected = False
+        # JPEG encoders release the GIL, so frames are encoded off the event loop
+        self._encode_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="slate-encode")
         
         self.ui_endpoint = endpoint or "127.0.0.1"
         self.ws_endpoint = f"ws://{self.ui_endpoint}:8000/ws/ml"
@@ -59,22 +97,30 @@ class SlateClient:
         self.current_frame = None
         self.q_values = []
         self.action_str = "None"
-        self.action_meanings = env.unwrapped.get_action_meanings()
+        # looked up once, interned so every frame shares the same action strings
+        self.action_meanings = tuple(sys.intern(meaning) for meaning in env.unwrapped.get_action_meanings())
         self.reward = 0
         self.done = False
         self.info = {}
         self.high_score = 0
         self.run_local = run_local
+        # Reused by `_send_state`, only the payload values change between frames
+        self._frame_msg = {"type": "frame_update", "payload": {}}
 
         self.ckpt_dir = checkpoints_dir
         self.checkpoints: list[str] = []
+        # packed checkpoints_update message, cleared whenever the list changes
+        self._checkpoints_msg: bytes|None = None
         self._rescan_checkpoints()
         self.checkpoint = (self.checkpoints[-1] if self.checkpoints else None) or ""
         
-        # Recording functionality
-        self.current_recording: list[dict] = []
+        # Recording functionality, the server records the live frames so the client
+        # only keeps a copy when it is asked to write one to `recording_dir`
+        self.recording_dir = recording_dir
+        self._recording_file = None
         self.is_recording = False
         self.run_start_time = None
+        self._run_start_ns = 0
 
 
     def _rescan_checkpoints(self) -> None:
@@ -88,20 +134,46 @@ class SlateClient:
         self.checkpoints = sorted(
             [f for f in os.listdir(self.ckpt_dir) if f.endswith(".pth")]
         )
+        self._checkpoints_msg = None
     
 
+    def _send(self, packed: bytes) -> None:
+        """
+        Queue a packed message for the server, it is written by `_writer`
+
+        Args:
+            packed: the message bytes produced by `pack_message`
+        """
+        self.outbox.put_nowait(packed)
+
+
+    async def _writer(self) -> None:
+        """
+        Write queued messages to the server
+
+        All messages already waiting in the queue are concatenated into a single
+        binary websocket message, so bursts (e.g. a state update followed by
+        run_completed) cost one write.
+        """
+        while True:
+            batch = [await self.outbox.get()]
+            while not self.outbox.empty():
+                batch.append(self.outbox.get_nowait())
+            await self.websocket.send(b''.join(batch))
+            if self.outbox.empty():
+                self._outbox_drained.set()
+
+
     async def _send_checkpoints(self) -> None:
         """
         Send checkpoints to the server via a websocket
         """
-        await self.websocket.send(
-            json.dumps(
-                {
-                    "type": "checkpoints_update",
-                    "payload": {"checkpoints": self.checkpoints},
-                }
-            )
-        )
+        if self._checkpoints_msg is None:
+            self._checkpoints_msg = pack_message({
+                "type": "checkpoints_update",
+                "payload": {"checkpoints": self.checkpoints},
+            })
+        self._send(self._checkpoints_msg)
 
 
     async def _stop_recording(self) -> None:
@@ -109,58 +181,98 @@ class SlateClient:
         Stop recording and send the current recording to the server.
         """
         if self.is_recording:
-            await self.websocket.send(json.dumps({
-                "type": "run_completed"
-            }))
+            self._send(pack_message({"type": "run_completed"}))
             self.is_recording = False
+            self.run_start_time = None
+            if self._recording_file is not None:
+                self._recording_file.close()
+                self._recording_file = None
         
 
     def _record_step(
             self, 
-            frame: str, 
+            frame: bytes, 
             reward: float,
               done: bool, 
               info: dict, 
               q_values: list|Tensor) -> None:
         """
         Record a single step in the current recording.
+
+        Steps are only recorded with a `recording_dir`, where each step is appended
+        to the run's file as a packed message (see `pack_message`) whose body holds
+        the frame, keeping memory use constant over long episodes.
         
         Args:
-            frame: Base64-encoded frame
+            frame: JPEG-encoded frame
             reward: Step reward
             done: Whether episode is done
             info: Environment info
             q_values: Q-values from agent
         """
-        if not self.is_recording:
+        if not (self.is_recording and self.recording_dir):
             return
-            
+
+        if self.run_start_time is None:
+            self.run_start_time = datetime.now()
+            self._run_start_ns = time.monotonic_ns()
+
         step_data = {
-            "frame": frame,
             "metadata": {
                 "reward": reward,
                 "done": done,
                 "info": info,
                 "q_values": q_values,
                 "action": self.action_str,
-                "timestamp": datetime.now().isoformat()
+                "t_ns": time.monotonic_ns() - self._run_start_ns
             }
         }
-        self.current_recording.append(step_data)
+
+        if self._recording_file is None:
+            filename = f"run_{self.run_start_time:%Y%m%d_%H%M%S_%f}.slate"
+            self._recording_file = open(os.path.join(self.recording_dir, filename), "wb")
+        self._recording_file.write(pack_message(step_data, frame))
 
 
-    def _encode_frame(self, frame: np.ndarray) -> str:
+    def _encode_frame(self, frame: np.ndarray) -> bytes:
         """
-        Encode an RGB image frame into a base64-encoded JPEG string.
+        Encode an RGB image frame into JPEG bytes.
+
+        Uses libjpeg-turbo through simplejpeg when it is installed, which encodes
+        the RGB array directly. Otherwise falls back to OpenCV, which needs the
+        frame converted to BGR first. Frames larger than `max_frame_size` are
+        downscaled first, as encode time and size grow with the pixel count.
 
         Args:
             frame: RGB image from the environment
 
         Returns:
-            str: Base64 string of the JPEG-encoded frame
+            bytes: the JPEG-encoded frame
         """
-        _, img = cv2.imencode('.jpg', cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
-        return base64.b64encode(img).decode('utf-8')
+        if self.max_frame_size:
+            height, width = frame.shape[:2]
+            scale = self.max_frame_size / max(height, width)
+            if scale < 1:
+                frame = cv2.resize(
+                    frame, 
+                    (max(1, round(width * scale)), max(1, round(height * scale))), 
+                    interpolation=cv2.INTER_AREA
+                )
+
+        if simplejpeg is not None:
+            return simplejpeg.encode_jpeg(
+                np.ascontiguousarray(frame), 
+                quality=self.jpeg_quality, 
+                colorspace='RGB', 
+                fastdct=True
+            )
+        
+        _, img = cv2.imencode(
+            '.jpg', 
+            cv2.cvtColor(frame, cv2.COLOR_RGB2BGR), 
+            [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+        )
+        return img.tobytes()
 
 
     async def _run_step(self) -> None:
@@ -168,26 +280,38 @@ class SlateClient:
         Execute a single step in the environment using the agent or random policy,
         and update internal state values.
 
+        The environment is only rendered while connected to the server, as
+        nothing would consume the frame otherwise.
+
         Raises:
             Any exception from the environment or rendering is propagated
         """
-        frame = self.env.render()
+        frame = self.env.render() if self._connected else None
         action = self.agent.get_action(self.obs)
         obs, reward, done, truncated, info = self.env.step(action)
         self.obs = obs
 
-        self.action_str = self.action_meanings[action]
+        action_str = self.action_meanings[action]
+        encoded = None
+        if frame is not None:
+            encoded = await asyncio.get_running_loop().run_in_executor(self._encode_pool, self._encode_frame, frame)
+        q_values = self.agent.get_q_values()
+        if isinstance(q_values, Tensor):
+            q_values = q_values.detach().cpu().numpy()
 
+        # the lock only guards publishing the finished step
         with self.state_lock:
-            self.current_frame = self._encode_frame(frame)
+            if encoded is not None:
+                self.current_frame = encoded
+            self.action_str = action_str
             self.reward = reward
             self.done = done
-            
             self.info = info
-            self.q_values = self.agent.get_q_values()
+            self.q_values = q_values
             self.high_score = max(self.high_score, reward)
 
-            self._record_step(self.current_frame, reward, done, info, self.q_values)
+        if encoded is not None:
+            self._record_step(encoded, reward, done, info, q_values)
 
         if done:
             await self._stop_recording()
@@ -200,34 +324,41 @@ class SlateClient:
         Send the current environment state, including encoded frame and metadata,
         over the active WebSocket connection.
 
+        The state is sent as a packed binary message with the JPEG frame as the
+        message body, avoiding base64-encoding the frame into JSON.
+
         Raises:
             websockets.exceptions.ConnectionClosed: If the connection is closed
         """
         with self.state_lock:
-            await self.websocket.send(json.dumps({
-                "type": "frame_update",
-                "payload": {
-                    "frame": self.current_frame,
-                    "reward": self.reward,
-                    "done": self.done,
-                    "info": self.info,
-                    "q_values": self.q_values,
-                    "action": self.action_str,
-                    "high_score": self.high_score,
-                    "checkpoint": self.checkpoint
-                }
-            },
-            cls = NumpyEncoder))
+            payload = self._frame_msg["payload"]
+            payload["reward"] = self.reward
+            payload["done"] = self.done
+            payload["info"] = self.info
+            payload["q_values"] = self.q_values
+            payload["action"] = self.action_str
+            payload["high_score"] = self.high_score
+            payload["checkpoint"] = self.checkpoint
+            frame = self.current_frame or b''
+        self._send(pack_message(self._frame_msg, frame))
     
 
     async def _run_loop(self) -> None:
         """
         Continuously execute steps in the environment and send updated state
         to the WebSocket server as long as `self.running` is True.
+
+        When the connection can't keep up, the loop waits for queued messages
+        to be written rather than encoding frames into a growing queue. While
+        disconnected, the loop keeps stepping without sending state.
         """
         while self.running:
+            if self._connected and self.outbox.qsize() >= MAX_PENDING_SENDS:
+                self._outbox_drained.clear()
+                await self._outbox_drained.wait()
             await self._run_step()
-            await self._send_state()
+            if self._connected:
+                await self._send_state()
             await asyncio.sleep(self.frame_rate)
 
 
@@ -236,11 +367,45 @@ class SlateClient:
         Continuously watch the checkpoints folder for additional checkpoints
 
         If additional checkpoints are found, then send the new checkpoint values
-        to the server via the websocket
+        to the server via the websocket. Filesystem events are used when watchdog
+        is installed, otherwise the folder is rescanned every second.
         """
         if not self.ckpt_dir:
             return
 
+        if Observer is None:
+            await self._poll_checkpoints()
+            return
+
+        changes: asyncio.Queue[tuple[str, bool]] = asyncio.Queue()
+        observer = Observer()
+        handler = _CheckpointEventHandler(asyncio.get_running_loop(), changes, self.ckpt_dir)
+        observer.schedule(handler, self.ckpt_dir)
+        observer.start()
+
+        try:
+            while True:
+                name, exists = await changes.get()
+                idx = bisect.bisect_left(self.checkpoints, name)
+                listed = idx < len(self.checkpoints) and self.checkpoints[idx] == name
+                if exists == listed:
+                    continue
+                
+                if exists:
+                    self.checkpoints.insert(idx, name)
+                else:
+                    del self.checkpoints[idx]
+                self._checkpoints_msg = None
+                await self._send_checkpoints()
+        finally:
+            observer.stop()
+            await asyncio.to_thread(observer.join)
+
+
+    async def _poll_checkpoints(self) -> None:
+        """
+        Rescan the checkpoints folder every second and send the checkpoints when they change
+        """
         all_checkpoints = set(self.checkpoints)
 
         while True:
@@ -253,9 +418,45 @@ class SlateClient:
                 await self._send_checkpoints()
 
 
+    async def _handle_command(self, data: dict) -> None:
+        """
+        Perform a single command received from the server, such as step, run, pause, and reset.
+
+        Args:
+            data: the decoded command message
+        """
+        command = data.get("type")
+
+        match command:
+            case "step":
+                self.is_recording = True
+                await self._run_step()
+                await self._send_state()
+            case "run":
+                self.running = True
+                self.is_recording = True
+                if not self.loop_task or self.loop_task.done():
+                    self.loop_task = asyncio.create_task(self._run_loop())
+            case "pause":
+                self.running = False
+            case "reset":
+                await self._stop_recording()
+                obs, _ = self.env.reset()
+                self.running = False
+            case "select_checkpoint":
+                self.checkpoint = data.get("checkpoint", "")
+                self.agent.load_checkpoint(os.path.join(self.ckpt_dir, self.checkpoint))
+                await self._send_state()
+            case "send_checkpoints":
+                await self._send_checkpoints()
+
+
     async def _ws_handler(self, websocket) -> None:
         """
-        Handle incoming WebSocket messages and perform actions like step, run, pause, and reset.
+        Handle incoming WebSocket messages and perform the commands they contain.
+
+        The server may batch several packed commands into a single binary message,
+        while plain text messages hold a JSON command or a JSON list of commands.
 
         Args:
             websocket: Connected WebSocket client
@@ -264,41 +465,33 @@ class SlateClient:
             websockets.exceptions.ConnectionClosed: If the WebSocket connection is terminated
         """
         self.websocket = websocket
+        self.outbox = asyncio.Queue()
+        self._connected = True
+        writer = asyncio.create_task(self._writer())
         print("[SlateRunner] connected to Slate server")
         await self._send_checkpoints()
 
-        if self.ckpt_dir:
-            asyncio.create_task(self._watch_checkpoints())
+        watcher = asyncio.create_task(self._watch_checkpoints()) if self.ckpt_dir else None
 
         try:
             async for msg in websocket:
-                data = json.loads(msg)
-                command = data.get("type")
-
-                match command:
-                    case "step":
-                        self.is_recording = True
-                        await self._run_step()
-                        await self._send_state()
-                    case "run":
-                        self.running = True
-                        self.is_recording = True
-                        if not self.loop_task or self.loop_task.done():
-                            self.loop_task = asyncio.create_task(self._run_loop())
-                    case "pause":
-                        self.running = False
-                    case "reset":
-                        await self._stop_recording()
-                        obs, _ = self.env.reset()
-                        self.running = False
-                    case "select_checkpoint":
-                        self.checkpoint = data.get("checkpoint", "")
-                        self.agent.load_checkpoint(os.path.join(self.ckpt_dir, self.checkpoint))
-                        await self._send_state()
-                    case "send_checkpoints":
-                        await self._send_checkpoints()
+                if isinstance(msg, bytes):
+                    commands = [header for header, _ in unpack_messages(msg)]
+                else:
+                    commands = orjson.loads(msg)
+                    if not isinstance(commands, list):
+                        commands = [commands]
+
+                for data in commands:
+                    await self._handle_command(data)
         except websockets.ConnectionClosed:
             print("[SlateRunner] connection lost")
+        finally:
+            self._connected = False
+            writer.cancel()
+            if watcher is not None:
+                watcher.cancel()
+            self._outbox_drained.set()
 
 
     async def _dial_and_serve(self, url: str) -> None:
@@ -312,7 +505,8 @@ class SlateClient:
         for _ in range(10):
             try:
                 print(f"[SlateRunner] dialing {url}")
-                async with websockets.connect(url) as ws:
+                # frames are already JPEG-compressed, so skip permessage-deflate
+                async with websockets.connect(url, compression=None) as ws:
                     await self._ws_handler(ws)
             except (ConnectionRefusedError, websockets.WebSocketException) as e:
                 print(f"   failed ({e}) – retry in 1 s")
@@ -323,6 +517,8 @@ class SlateClient:
         """
         Start the client and block the main thread to handle interaction with the WebSocket server.
         """
+        # uvloop cuts per-message latency when installed (pip install Slate[fast])
+        run = uvloop.run if uvloop else asyncio.run
         if self.run_local:
             try:
                 from .server import start_local_server
@@ -331,4 +527,41 @@ class SlateClient:
             except Exception as e:
                 print(f"[Slate] Failed to start local server: {e}")
         
-        asyncio.run(self._dial_and_serve(self.ws_endpoint))
\ No newline at end of file
+        run(self._dial_and_serve(self.ws_endpoint))
+
+
+class _CheckpointEventHandler(FileSystemEventHandler):
+    """
+    Forwards .pth files appearing in or leaving the checkpoints folder to the client's event loop
+
+    Args:
+        loop: the event loop the client runs on
+        changes: queue receiving (filename, exists) pairs for changed checkpoints
+        directory: the checkpoints folder, files moved to or from other folders only count on its side
+    """
+    def __init__(self, loop: asyncio.AbstractEventLoop, changes: asyncio.Queue, directory: str):
+        super().__init__()
+        self.loop = loop
+        self.changes = changes
+        self.directory = os.path.abspath(directory)
+
+
+    def _push(self, path: str, exists: bool) -> None:
+        if path.endswith(".pth") and os.path.dirname(os.path.abspath(path)) == self.directory:
+            self.loop.call_soon_threadsafe(self.changes.put_nowait, (os.path.basename(path), exists))
+
+
+    def on_created(self, event) -> None:
+        if not event.is_directory:
+            self._push(event.src_path, True)
+
+
+    def on_deleted(self, event) -> None:
+        if not event.is_directory:
+            self._push(event.src_path, False)
+
+
+    def on_moved(self, event) -> None:
+        if not event.is_directory:
+            self._push(event.src_path, False)
+            self._push(event.dest_path, True)
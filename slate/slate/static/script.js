@@ -23,6 +23,14 @@ class SlateViewer {
     this.isPlaybackPaused = true;
     this.isAwaitingFrame = false;
     this.shouldPauseAfterFrame = false;
+    this.playbackCache = new Map();
+    // first frames of the bulk ranges requested for the cache, see prefetchPlayback
+    this.playbackRequested = new Set();
+    this.playbackBulkSize = 256;  // matches PLAYBACK_BULK_SIZE on the server
+    this.playbackBundleId = 0;
+    this.playbackCredits = 16;
+    this.textDecoder = new TextDecoder();
+    this.frameUrl = null;
     
     this.connect();
     this.scheduleRetry();
@@ -37,6 +45,7 @@ class SlateViewer {
     this.updateConnectionStatus('connecting', 'Connecting...');
     
     this.ws = new WebSocket(wsUrl);
+    this.ws.binaryType = "arraybuffer";
 
     this.ws.onopen = () => {
       console.log("Socket connected, requesting checkpoints and run history");
@@ -64,7 +73,9 @@ class SlateViewer {
     };
 
     this.ws.onmessage = (event) => {
-      const data = JSON.parse(event.data);
+      const data = typeof event.data === "string"
+        ? JSON.parse(event.data)
+        : this.decodeBinaryMessage(event.data);
       const msgType = data.type;
 
       switch (msgType) {
@@ -74,14 +85,20 @@ class SlateViewer {
         case "frame_update":
           this.handleFrameUpdate(data);
           break;
+        case "frame_batch":
+          this.handleFrameBatch(data);
+          break;
         case "run_history_update":
           this.handleRunHistoryUpdate(data);
           break;
         case "playback:loaded":
           this.handlePlaybackLoaded(data);
           break;
-        case "playback:frame":
-          this.handlePlaybackFrame(data);
+        case "playback:frames":
+          this.handlePlaybackFrames(data);
+          break;
+        case "playback:bulk":
+          this.handlePlaybackBulk(data);
           break;
         case "playback:eos":
           this.handlePlaybackEOS(data);
@@ -101,6 +118,37 @@ class SlateViewer {
     };
   }
 
+  /**
+   * Decode a packed binary message: [u32 header_len][u32 body_len][JSON header][body]
+   * The body holds JPEG frames back to back, split using `frame_sizes` into Blobs
+   */
+  decodeBinaryMessage(buffer) {
+    const view = new DataView(buffer);
+    const headerLen = view.getUint32(0, true);
+    const msg = JSON.parse(this.textDecoder.decode(new Uint8Array(buffer, 8, headerLen)));
+
+    let offset = 8 + headerLen;
+    (msg.frame_sizes || []).forEach((size, idx) => {
+      msg.frames[idx].frame = new Blob([new Uint8Array(buffer, offset, size)], { type: "image/jpeg" });
+      offset += size;
+    });
+    return msg;
+  }
+
+  /**
+   * Show a JPEG Blob in the frame element, releasing the previously shown image
+   */
+  showFrame(frameElement, blob) {
+    if (this.frameUrl) URL.revokeObjectURL(this.frameUrl);
+    this.frameUrl = URL.createObjectURL(blob);
+
+    frameElement.style.opacity = '0.7';
+    frameElement.src = this.frameUrl;
+    frameElement.onload = () => {
+      frameElement.style.opacity = '1';
+    };
+  }
+
   /**
    * Helper method to serialize and send payloads over the WebSocket
    */
@@ -169,14 +217,7 @@ class SlateViewer {
     if (this.isPlaybackMode) return;
 
     const payload = msg.payload;
-    const frameElement = document.getElementById("env_frame");
-    
-    frameElement.style.opacity = '0.7';
-    frameElement.src = "data:image/jpeg;base64," + payload.frame;
-    
-    frameElement.onload = () => {
-      frameElement.style.opacity = '1';
-    };
+    this.showFrame(document.getElementById("env_frame"), payload.frame);
 
     this.updateInfoDisplay(payload);
     this.syncCheckpointDropdown(payload.checkpoint);
@@ -197,6 +238,13 @@ class SlateViewer {
     }
   }
 
+  /**
+   * Handle a batch of frame updates from the ML client (live mode only)
+   */
+  handleFrameBatch(msg) {
+    msg.frames.forEach((payload) => this.handleFrameUpdate({ payload }));
+  }
+
   /**
    * Handle run history updates from the server
    */
@@ -214,20 +262,98 @@ class SlateViewer {
     this.currentFrameCursor = 0;
     this.isPlaybackPaused = true;
     this.isAwaitingFrame = false;
+    this.playbackCache = new Map();
+    this.playbackRequested = new Set();
+    this.playbackBundleId++;
     this.enterPlaybackMode();
+    this.prefetchPlayback();
+  }
+
+  /**
+   * Handle a bulk range of playback frames, caching them for instant stepping
+   */
+  handlePlaybackBulk(msg) {
+    if (!this.isPlaybackMode || !this.currentPlaybackRun) return;
+    if (msg.run_id !== this.currentPlaybackRun.id) return;
+    // the cursor has moved on since the range was requested
+    if (!this.playbackRequested.has(msg.start)) return;
+
+    msg.frames.forEach((frameData, idx) => {
+      this.playbackCache.set(msg.start + idx, frameData);
+    });
   }
 
   /**
-   * Handle playback frame event from the server
+   * Keep the bulk ranges before, at and after the playback cursor cached,
+   * requesting missing ranges and dropping ranges that fall outside the window
    */
-  handlePlaybackFrame(msg) {
+  prefetchPlayback() {
     if (!this.isPlaybackMode || !this.currentPlaybackRun) return;
 
-    const frameData = msg.frame_data;
-    const cursor = msg.cursor;
+    const size = this.playbackBulkSize;
+    const current = Math.floor(this.currentFrameCursor / size) * size;
+    const starts = [current - size, current, current + size].filter(
+      (start) => start >= 0 && start < this.currentPlaybackRun.total_steps
+    );
 
+    for (const start of this.playbackRequested) {
+      if (starts.includes(start)) continue;
+      this.playbackRequested.delete(start);
+      for (let idx = start; idx < start + size; idx++) this.playbackCache.delete(idx);
+    }
+
+    for (const start of starts) {
+      if (this.playbackRequested.has(start)) continue;
+      this.playbackRequested.add(start);
+      this._send("playback:bulk", { start });
+    }
+  }
+
+  /**
+   * Handle a bundle of playback frames from the server, playing them back
+   * `msg.interval` seconds apart and acking once the last frame is shown
+   */
+  handlePlaybackFrames(msg) {
+    if (!this.isPlaybackMode || !this.currentPlaybackRun) return;
+
+    const bundleId = ++this.playbackBundleId;
+    const playFrame = (idx) => {
+      // a newer bundle or a seek has taken over
+      if (bundleId !== this.playbackBundleId || !this.isPlaybackMode) return;
+
+      // paused mid-bundle, move the server back to the first frame not shown
+      if (this.isPlaybackPaused && idx > 0) {
+        this._send("playback:seek", { frame: msg.cursors[idx] });
+        return;
+      }
+
+      if (this.renderPlaybackFrame(msg.frames[idx])) {
+        this.currentFrameCursor = msg.cursors[idx];
+        this.prefetchPlayback();
+      }
+
+      if (this.shouldPauseAfterFrame) {
+        this.shouldPauseAfterFrame = false;
+        setTimeout(() => {
+          this.pausePlayback();
+        }, 50);
+      }
+
+      if (idx + 1 < msg.frames.length) {
+        setTimeout(() => playFrame(idx + 1), msg.interval * 1000);
+      } else {
+        this.isAwaitingFrame = false;
+        this._send("playback:ack", { credits: this.playbackCredits });
+      }
+    };
+    playFrame(0);
+  }
+
+  /**
+   * Render a single playback frame, returns false if the frame data is malformed
+   */
+  renderPlaybackFrame(frameData) {
     const frameElement = document.getElementById("env_frame");
-    frameElement.style.opacity = '0.7';
     
     let frameImage, reward, qValues, action, checkpoint;
     
@@ -251,16 +377,10 @@ class SlateViewer {
       checkpoint = meta.checkpoint || this.currentPlaybackRun.checkpoint;
     } else {
       console.warn("Unexpected frame_data structure. Received:", frameData);
-      
-      this.isAwaitingFrame = false;
-      this._send("playback:ack");
-      return;
+      return false;
     }
 
-    frameElement.src = "data:image/jpeg;base64," + frameImage;
-    frameElement.onload = () => {
-      frameElement.style.opacity = '1';
-    };
+    this.showFrame(frameElement, frameImage);
 
     if (qValues !== undefined && action !== undefined) {
       this.updateInfoDisplay({
@@ -276,16 +396,7 @@ class SlateViewer {
       scoreElement.innerText = Math.round(reward);
     }
 
-    this.currentFrameCursor = cursor;
-    this.isAwaitingFrame = false;
-    this._send("playback:ack");
-
-    if (this.shouldPauseAfterFrame) {
-      this.shouldPauseAfterFrame = false;
-      setTimeout(() => {
-        this.pausePlayback();
-      }, 50);
-    }
+    return true;
   }
 
   /**
@@ -315,6 +426,7 @@ class SlateViewer {
   handlePlaybackSeekOk(msg) {
     console.log("Seek successful, cursor:", msg.cursor);
     this.currentFrameCursor = msg.cursor;
+    this.prefetchPlayback();
   }
 
   /**
@@ -406,6 +518,8 @@ class SlateViewer {
   exitPlaybackMode() {
     this.isPlaybackMode = false;
     this.currentPlaybackRun = null;
+    this.playbackCache = new Map();
+    this.playbackRequested = new Set();
     this.currentFrameCursor = 0;
     this.isPlaybackPaused = true;
     this.isAwaitingFrame = false;
@@ -458,6 +572,7 @@ class SlateViewer {
     if (!this.isPlaybackMode || !this.currentPlaybackRun) return;
 
     this.isPlaybackPaused = true;
+    this.playbackBundleId++;
     this._send("playback:seek", { frame: 0 });
     
     document.getElementById('playback_play').classList.add('active');
@@ -475,6 +590,7 @@ class SlateViewer {
       console.warn("Seek frame out of range:", frameIndex);
       return;
     }
+    this.playbackBundleId++;
     this._send("playback:seek", { frame: frameIndex });
   }
 
@@ -511,7 +627,13 @@ class SlateViewer {
       return;
     }
 
-    if (this.isPlaybackPaused) {
+    this.playbackBundleId++;
+    const cached = this.playbackCache.get(frameIndex);
+    if (this.isPlaybackPaused && cached && this.renderPlaybackFrame(cached)) {
+      this.currentFrameCursor = frameIndex;
+      this.prefetchPlayback();
+      this._send("playback:seek", { frame: frameIndex });
+    } else if (this.isPlaybackPaused) {
       this.shouldPauseAfterFrame = true;
       this._send("playback:seek", { frame: frameIndex });
       this._send("playback:resume");
@@ -1,12 +1,30 @@
 import torch
-from collections import deque
-import json
 import numpy as np
 import torch
 
 
+def to_tensor(frame):
+	"""
+	Convert an HWC uint8 frame (or an HW grayscale frame) into a CHW float tensor in [0, 1]
+
+	Equivalent to torchvision's ToPILImage followed by ToTensor, but without the
+	PIL round trip: the numpy buffer is wrapped without a copy and scaled in place
+	"""
+	tensor = torch.from_numpy(np.ascontiguousarray(frame))
+	if tensor.ndim == 2:
+		tensor = tensor.unsqueeze(-1)
+	return tensor.permute(2, 0, 1).float().div_(255.0)
+
+
 class FrameBuffer:
-	def __init__(self, frame, buffer_len, transform):
+	"""
+	Stack of the most recent frames, preallocated as a ring buffer
+
+	Every frame is written twice, at its slot and at its slot + buffer_len, so the
+	last buffer_len frames always form one contiguous slice of the buffer and
+	building the state is a single copy instead of a torch.cat over the stack.
+	"""
+	def __init__(self, frame, buffer_len, transform=to_tensor):
 		self.transform = transform
 		self.buffer_len = buffer_len
 
@@ -14,12 +32,13 @@ class FrameBuffer:
 
 
 	def append(self, frame):
-		frame_tensor = self.transform(frame).unsqueeze(0)
-		self.frame_stack.append(frame_tensor)
+		self._write(self.transform(frame))
 
 
 	def stack_frames(self):
-		return torch.cat(list(self.frame_stack), dim=1)
+		channels = self.channels
+		start = (self.head + 1) * channels
+		return self.buffer[:, start:start + self.buffer_len * channels].clone()
 
 
 	def state(self):
@@ -27,20 +46,32 @@ class FrameBuffer:
 	
 	
 	def reset(self, frame):
-		frame_tensor = self.transform(frame).unsqueeze(0)
-		self.frame_stack = deque([frame_tensor] * self.buffer_len, maxlen=self.buffer_len)
-
-
-class NumpyEncoder(json.JSONEncoder):
-    def default(self, o):
-        if isinstance(o, np.integer):
-            return int(o)
-        if isinstance(o, np.floating):
-            return float(o)
-        if isinstance(o, np.ndarray):
-            return o.tolist()
-        if isinstance(o, torch.Tensor):
-            return o.detach().cpu().tolist()
-        if isinstance(o, torch.dtype):
-              return str(o)
-        return super().default(o)
+		frame_tensor = self.transform(frame)
+		self.channels = frame_tensor.shape[0]
+		self.buffer = frame_tensor.repeat(2 * self.buffer_len, 1, 1).unsqueeze(0)
+		self.head = self.buffer_len - 1
+
+
+	def _write(self, frame_tensor):
+		self.head = (self.head + 1) % self.buffer_len
+		channels = self.channels
+		for slot in (self.head, self.head + self.buffer_len):
+			self.buffer[0, slot * channels:(slot + 1) * channels] = frame_tensor
+
+
+def json_default(o):
+	"""
+	Serialise the values orjson does not handle natively, numpy values are
+	covered by orjson's OPT_SERIALIZE_NUMPY option
+	"""
+	if isinstance(o, np.integer):
+		return int(o)
+	if isinstance(o, np.floating):
+		return float(o)
+	if isinstance(o, np.ndarray):
+		return o.tolist()
+	if isinstance(o, torch.Tensor):
+		return o.detach().cpu().tolist()
+	if isinstance(o, torch.dtype):
+		return str(o)
+	raise TypeError
@@ -1,97 +1,530 @@
-import io
+import functools
+import itertools
+import os
 import struct
 import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
 
+import numpy as np
 
-def delta_encode_frames(frames: list[str]) -> bytes:
+try:
+    import deflate
+except ImportError:
+    deflate = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+__all__ = [
+    "encode_video_to_s4",
+    "decode_s4_to_video",
+    "delta_encode_frames",
+    "delta_decode_frames",
+    "S4_VERSION_RECORDS",
+    "S4_VERSION_COLUMNS",
+    "DEFAULT_VERSION",
+    "S4_COMPRESSION_ZLIB",
+    "S4_COMPRESSION_ZSTD",
+]
+
+_MAGIC = b'S4V1'
+_MAGIC_U32 = int.from_bytes(_MAGIC, 'little')  # magic as read by _U32, compared as one integer
+
+_U8 = struct.Struct('<B')
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+_U16_PAIR = struct.Struct('<HH')
+# per-frame delta header: frame length, compressed delta length
+_FRAME_HEADER = struct.Struct('<II')
+# per-frame metadata header: reward, action index, q-value count
+_META = struct.Struct('<hBB')
+
+
+@functools.lru_cache(maxsize=16)
+def _q_values_struct(count: int) -> struct.Struct:
+    return struct.Struct(f'<{count}h')
+
+
+def _pack_metadata_columns(metadata: list[dict], action_to_index: dict[str, int]) -> bytes:
+    """
+    Pack the per-frame metadata column by column
+
+    Format:
+        [rewards: frame_count int16]
+        [action indices: frame_count uint8]
+        [q-value counts: frame_count uint8]
+        [q-values: sum of the q-value counts int16]
+
+    Args:
+        metadata: per-frame metadata of the recording
+        action_to_index: index of each action name in the action space
+
+    Return:
+        the packed metadata columns
+    """
+    q_counts = np.array([len(meta.get('q_values', [])) for meta in metadata], dtype=np.int64)
+    if len(action_to_index) > 0x100 or (q_counts.size and q_counts.max() > 0xFF):
+        raise ValueError("S4 stores at most 256 actions and 255 q-values per frame")
+
+    # rewards are truncated and q-values rounded to hundredths
+    rewards = (np.array([meta['reward'] for meta in metadata], dtype=np.float64) * 100).astype(np.int64)
+    q_values = np.round(np.fromiter(
+        itertools.chain.from_iterable(meta.get('q_values', []) for meta in metadata),
+        dtype=np.float64,
+        count=int(q_counts.sum())
+    ) * 100)
+    if not (_in_int16_range(rewards) and _in_int16_range(q_values)):
+        raise ValueError("S4 stores rewards and q-values between -327.68 and 327.67")
+
+    actions = np.array([action_to_index[meta['action']] for meta in metadata], dtype=np.uint8)
+    return b''.join((
+        rewards.astype('<i2').tobytes(),
+        actions.tobytes(),
+        q_counts.astype(np.uint8).tobytes(),
+        q_values.astype('<i2').tobytes()
+    ))
+
+
+def _read_metadata_columns(s4_data: bytes, offset: int, frame_count: int, actions: list[str]) -> list[dict]:
+    """
+    Read per-frame metadata stored column by column, see `_pack_metadata_columns`
+
+    Args:
+        s4_data: byte stream of S4 video data
+        offset: position of the first metadata column
+        frame_count: number of frames
+        actions: the action space of the recording
+
+    Return:
+        list of per-frame metadata dictionaries
+    """
+    rewards = np.frombuffer(s4_data, dtype='<i2', count=frame_count, offset=offset)
+    offset += rewards.nbytes
+    action_idxs = np.frombuffer(s4_data, dtype=np.uint8, count=frame_count, offset=offset)
+    offset += action_idxs.nbytes
+    q_counts = np.frombuffer(s4_data, dtype=np.uint8, count=frame_count, offset=offset)
+    offset += q_counts.nbytes
+    q_flat = np.frombuffer(s4_data, dtype='<i2', count=int(q_counts.sum(dtype=np.int64)), offset=offset) / 100.0
+
+    if frame_count and (q_counts == q_counts[0]).all():
+        q_values = q_flat.reshape(frame_count, int(q_counts[0])).tolist()
+    else:
+        q_list = q_flat.tolist()
+        ends = np.cumsum(q_counts, dtype=np.int64).tolist()
+        q_values = [q_list[end - count:end] for end, count in zip(ends, q_counts.tolist())]
+
+    return _metadata_dicts((rewards / 100.0).tolist(), action_idxs.tolist(), q_values, actions)
+
+
+def _metadata_dicts(rewards: list[float], action_idxs: list[int], q_values: list[list[float]], actions: list[str]) -> list[dict]:
+    """
+    Build the per-frame metadata dictionaries from decoded columns
+
+    Args:
+        rewards: reward of each frame
+        action_idxs: action index of each frame
+        q_values: q-values of each frame
+        actions: the action space of the recording
+
+    Return:
+        list of per-frame metadata dictionaries
+    """
+    return [
+        {
+            'reward': reward,
+            'action': actions[action_idx] if action_idx < len(actions) else 'ERR',
+            'q_values': frame_q_values,
+            'done': False,
+            'info': {},
+            'timestep': ''
+        }
+        for reward, action_idx, frame_q_values in zip(rewards, action_idxs, q_values)
+    ]
+
+
+def _in_int16_range(values: np.ndarray) -> bool:
+    return values.size == 0 or (values.min() >= -0x8000 and values.max() <= 0x7FFF)
+
+
+_CODEC_WORKERS = os.cpu_count() or 1
+_pool: ThreadPoolExecutor|None = None
+
+
+# the S4 version decides how metadata and frame lengths are laid out
+S4_VERSION_RECORDS = 1  # per-frame metadata records, fixed-width frame lengths, zlib only
+S4_VERSION_COLUMNS = 2  # metadata stored column by column, varint frame lengths, any compression
+DEFAULT_VERSION = S4_VERSION_COLUMNS
+
+# the compression decides how frame deltas are formed and compressed
+S4_COMPRESSION_ZLIB = 0  # modular subtraction deltas, compressed with zlib
+S4_COMPRESSION_ZSTD = 1  # XOR deltas, compressed with zstd (pip install Slate[fast])
+
+_ZERO = np.uint8(0)  # padding byte for the shorter of two frames
+_ACCUMULATE_BLOCK = 256  # frames reconstructed together on the cumulative XOR path
+
+
+def _zlib_compress(data: bytes) -> bytes:
+    """
+    Compress data in the zlib format, using libdeflate when it is installed
+
+    Args:
+        data: bytes to compress
+    
+    Return:
+        zlib stream of the data
+    """
+    if deflate is not None:
+        return deflate.zlib_compress(data, 6)
+    return zlib.compress(data)
+
+
+def _zlib_decompress(data: bytes, size: int|None) -> bytes:
+    """
+    Decompress a zlib stream, using libdeflate when it is installed and the size is known
+
+    Args:
+        data: zlib stream to decompress
+        size: length of the decompressed data, or None if it is unknown
+    
+    Return:
+        the decompressed bytes
+    """
+    if deflate is not None and size is not None:
+        return deflate.zlib_decompress(data, size)
+    return zlib.decompress(data)
+
+
+def _frame_codec(compression: int) -> tuple:
+    """
+    Get the delta operation and compression functions used by an S4 compression
+
+    Args:
+        compression: S4 compression id
+    
+    Return:
+        tuple of (delta, inverse delta, compress, decompress) functions, decompress
+        also takes the decompressed size when it is known
+    """
+    if compression == S4_COMPRESSION_ZLIB:
+        return np.subtract, np.subtract, _zlib_compress, _zlib_decompress
+    
+    if compression == S4_COMPRESSION_ZSTD:
+        if zstandard is None:
+            raise ValueError("S4 zstd compression requires the zstandard package")
+        compressor = zstandard.ZstdCompressor(level=3)
+        decompressor = zstandard.ZstdDecompressor()
+
+        def decompress(data: bytes, size: int|None) -> bytes:
+            return decompressor.decompress(data)
+
+        return np.bitwise_xor, np.bitwise_xor, compressor.compress, decompress
+    
+    raise ValueError(f"Unsupported S4 compression: {compression}")
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    """
+    Append an unsigned integer to a buffer as a LEB128 varint
+
+    Args:
+        out: buffer to append to
+        value: non-negative integer to write
+    """
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: memoryview, offset: int) -> tuple[int, int]:
+    """
+    Read a LEB128 varint written by `_write_varint`
+
+    Args:
+        data: buffer to read from
+        offset: position of the varint in the buffer
+    
+    Return:
+        tuple of (value, offset just past the varint)
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def _parallel_map(func: Callable, items: list) -> list:
+    """
+    Apply a function to every item, split across the codec thread pool
+
+    zlib, libdeflate and zstd release the GIL while they (de)compress, so
+    compressing on several threads runs on several cores.
+
+    Args:
+        func: function to apply
+        items: items to apply it to
+    
+    Return:
+        list of results in the order of the items
+    """
+    global _pool
+
+    if _CODEC_WORKERS < 2 or len(items) < 2:
+        return [func(item) for item in items]
+    
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=_CODEC_WORKERS, thread_name_prefix="s4-codec")
+    
+    # one contiguous chunk per worker keeps the per-task overhead off small frames
+    chunk_size = -(-len(items) // _CODEC_WORKERS)
+    chunks = [items[idx:idx + chunk_size] for idx in range(0, len(items), chunk_size)]
+    results = _pool.map(lambda chunk: [func(item) for item in chunk], chunks)
+    return [result for chunk_results in results for result in chunk_results]
+
+
+def _padded(data: bytes, length: int) -> np.ndarray:
+    """
+    View bytes as a uint8 array, zero-padded up to `length`
+
+    Args:
+        data: bytes to view
+        length: minimum length of the returned array
+    
+    Return:
+        uint8 array of the bytes followed by any padding
+    """
+    array = np.frombuffer(data, dtype=np.uint8)
+    if len(array) < length:
+        array = np.pad(array, (0, length - len(array)))
+    return array
+
+
+def _frame_delta(delta: np.ufunc, prev: bytes, curr: bytes, out: np.ndarray) -> np.ndarray:
+    """
+    Delta two frames into a reused buffer, treating the shorter frame as zero-padded
+
+    The overlap and the tail are written separately so no padded copy of
+    either frame is made.
+
+    Args:
+        delta: delta operation
+        prev: previous frame
+        curr: current frame
+        out: buffer at least as long as the longer frame
+    
+    Return:
+        view of `out` holding the delta
+    """
+    prev_array = np.frombuffer(prev, dtype=np.uint8)
+    curr_array = np.frombuffer(curr, dtype=np.uint8)
+    overlap = min(len(prev_array), len(curr_array))
+    delta_len = max(len(prev_array), len(curr_array))
+    
+    delta(prev_array[:overlap], curr_array[:overlap], out=out[:overlap])
+    if len(prev_array) > overlap:
+        delta(prev_array[overlap:], _ZERO, out=out[overlap:delta_len])
+    elif len(curr_array) > overlap:
+        delta(_ZERO, curr_array[overlap:], out=out[overlap:delta_len])
+    
+    return out[:delta_len]
+
+
+def delta_encode_frames(
+        frames: list[str],
+        version: int = DEFAULT_VERSION,
+        compression: int = S4_COMPRESSION_ZLIB
+    ) -> bytes:
     """
     Compress video frames using delta-encoding
 
+    The deltas are formed in order, then compressed in parallel as each one
+    is compressed independently.
+
     Args:
         frames: list of frames to compress
+        version: S4 version deciding how frame lengths are stored
+        compression: S4 compression deciding the delta operation and compressor
     
     Return:
         byte stream of compressed frames
     """
-    frame_stream = io.BytesIO()
+    frame_stream = bytearray()
+    _delta_encode_into(frames, frame_stream, version, compression)
+    return bytes(frame_stream)
+
+
+def _delta_encode_into(frames: list[str], out: bytearray, version: int, compression: int) -> None:
+    """
+    Delta-encode and compress video frames, appending the byte stream to `out`
+
+    Args:
+        frames: list of frames to compress
+        out: buffer the compressed frames are appended to
+        version: S4 version deciding how frame lengths are stored
+        compression: S4 compression deciding the delta operation and compressor
+    """
+    delta, _, compress, _ = _frame_codec(compression)
     
-    prev_frame_bytes = frames[0].encode('utf-8')
-    compressed_first = zlib.compress(prev_frame_bytes)
+    frames_bytes = [frame.encode('utf-8') for frame in frames]
+    deltas = [frames_bytes[0]]
+    delta_buffer = np.empty(max(map(len, frames_bytes)), dtype=np.uint8)
+    for prev_frame_bytes, frame_bytes in zip(frames_bytes, frames_bytes[1:]):
+        # delta-encode frame, uint8 arithmetic wraps modulo 256
+        frame_delta = _frame_delta(delta, prev_frame_bytes, frame_bytes, delta_buffer)
+        deltas.append(frame_delta.tobytes())
     
-    frame_stream.write(struct.pack('<I', len(compressed_first)))
-    frame_stream.write(compressed_first)
+    compressed_first, *compressed_deltas = _parallel_map(compress, deltas)
+    varint_lengths = version != S4_VERSION_RECORDS
+    
+    if varint_lengths:
+        _write_varint(out, len(compressed_first))
+    else:
+        out += _U32.pack(len(compressed_first))
+    out += compressed_first
 
-    for frame in frames[1:]:
-        frame_bytes = frame.encode('utf-8')
-        
-        # delta-encode frame
-        max_len = max(len(prev_frame_bytes), len(frame_bytes))
-        prev_padded = prev_frame_bytes + b'\x00' * (max_len - len(prev_frame_bytes))
-        curr_padded = frame_bytes + b'\x00' * (max_len - len(frame_bytes))
-        
-        frame_delta = bytes((p - c) % 256 for p, c in zip(prev_padded, curr_padded))
-        
-        compressed_delta = zlib.compress(frame_delta)
-        
-        # write frame header
-        frame_stream.write(struct.pack('<I', len(frame_bytes)))  # used for decoding
-        frame_stream.write(struct.pack('<I', len(compressed_delta)))
+    for frame_bytes, compressed_delta in zip(frames_bytes[1:], compressed_deltas):
+        # write frame header, the frame length is used for decoding
+        if varint_lengths:
+            _write_varint(out, len(frame_bytes))
+            _write_varint(out, len(compressed_delta))
+        else:
+            out += _FRAME_HEADER.pack(len(frame_bytes), len(compressed_delta))
 
         # write frame data
-        frame_stream.write(compressed_delta)
-        
-        prev_frame_bytes = frame_bytes
+        out += compressed_delta
+
+
+def _accumulate_xor_frames(first_frame: bytes, frame_deltas: list[bytes]) -> list[str]:
+    """
+    Reconstruct equal-length frames from their XOR deltas using a cumulative XOR
+
+    Each frame is the first frame XORed with every delta up to it. XOR has no
+    carries, so the rows are accumulated eight bytes at a time as uint64 lanes,
+    a block of frames at a time to bound memory use on long recordings.
 
-    return frame_stream.getvalue()
+    Args:
+        first_frame: uncompressed first frame
+        frame_deltas: decompressed deltas of the following frames, all as long as the first frame
+    
+    Return:
+        list of the reconstructed frames following the first frame
+    """
+    frame_len = len(first_frame)
+    row_len = -(-frame_len // 8) * 8  # rows are padded to whole uint64 lanes
+    base = np.zeros(row_len, dtype=np.uint8)
+    base[:frame_len] = np.frombuffer(first_frame, dtype=np.uint8)
+    frames = []
+    
+    for start in range(0, len(frame_deltas), _ACCUMULATE_BLOCK):
+        block = frame_deltas[start:start + _ACCUMULATE_BLOCK]
+        recon = np.zeros((len(block), row_len), dtype=np.uint8)
+        recon[:, :frame_len] = np.frombuffer(b''.join(block), dtype=np.uint8).reshape(len(block), frame_len)
+        
+        lanes = recon.view(np.uint64)
+        np.bitwise_xor.accumulate(lanes, axis=0, out=lanes)
+        np.bitwise_xor(lanes, base.view(np.uint64), out=lanes)
+        
+        frames.extend(str(row[:frame_len].data, 'utf-8') for row in recon)
+        base = recon[-1]
+    
+    return frames
 
 
-def delta_decode_frames(encoded_data: bytes) -> list[str]:
+def delta_decode_frames(
+        encoded_data: bytes,
+        version: int = DEFAULT_VERSION,
+        compression: int = S4_COMPRESSION_ZLIB
+    ) -> list[str]:
     """
     Decompress delta-encoded frames
 
+    The deltas are decompressed in parallel, then applied in order to
+    reconstruct the frames.
+
     Args:
         encoded_data: delta-encoded compressed data to decode
+        version: S4 version the data was encoded with
+        compression: S4 compression the data was encoded with
     
     Return:
         list of decoded video frames
     """
-    frames = []
-    stream = io.BytesIO(encoded_data)
+    _, inverse_delta, _, decompress = _frame_codec(compression)
+    data = memoryview(encoded_data)
     
-    length_bytes = stream.read(4)
-    compressed_len = struct.unpack('<I', length_bytes)[0]
-    compressed_data = stream.read(compressed_len)
+    varint_lengths = version != S4_VERSION_RECORDS
     
-    prev_frame_bytes = zlib.decompress(compressed_data)
-    frames.append(prev_frame_bytes.decode('utf-8'))
+    if varint_lengths:
+        compressed_len, offset = _read_varint(data, 0)
+    else:
+        compressed_len = _U32.unpack_from(data, 0)[0]
+        offset = _U32.size
+    prev_frame_bytes = decompress(data[offset:offset + compressed_len], None)
+    offset += compressed_len
+    frames = [prev_frame_bytes.decode('utf-8')]
     
-    while stream.tell() < len(encoded_data):
-        # read frame metadata
-        frame_len_bytes = stream.read(4)
-        frame_length = struct.unpack('<I', frame_len_bytes)[0]
-        
-        comp_len_bytes = stream.read(4)
-        compressed_len = struct.unpack('<I', comp_len_bytes)[0]
-        
-        compressed_delta = stream.read(compressed_len)
-        frame_delta = zlib.decompress(compressed_delta)
+    # read every frame header first, deltas span the longer of the previous and current frame
+    frame_lengths = []
+    jobs = []
+    prev_length = len(prev_frame_bytes)
+    while offset < len(data):
+        if varint_lengths:
+            frame_length, offset = _read_varint(data, offset)
+            compressed_len, offset = _read_varint(data, offset)
+        else:
+            frame_length, compressed_len = _FRAME_HEADER.unpack_from(data, offset)
+            offset += _FRAME_HEADER.size
         
-        # reconstruct frame
-        max_len = max(len(prev_frame_bytes), len(frame_delta))
-        prev_padded = prev_frame_bytes + b'\x00' * (max_len - len(prev_frame_bytes))
-        delta_padded = frame_delta + b'\x00' * (max_len - len(frame_delta))
-
-        frame_bytes = bytes((p - d) % 256 for p, d in zip(prev_padded, delta_padded))
+        frame_lengths.append(frame_length)
+        jobs.append((data[offset:offset + compressed_len], max(prev_length, frame_length)))
+        offset += compressed_len
+        prev_length = frame_length
+    
+    frame_deltas = _parallel_map(lambda job: decompress(*job), jobs)
+    
+    first_length = len(prev_frame_bytes)
+    if (inverse_delta is np.bitwise_xor
+            and all(length == first_length for length in frame_lengths)
+            and all(len(delta) == first_length for delta in frame_deltas)):
+        frames.extend(_accumulate_xor_frames(prev_frame_bytes, frame_deltas))
+        return frames
+    
+    # frames are reconstructed into two reused buffers, swapping roles every frame
+    max_len = max([len(prev_frame_bytes), *map(len, frame_deltas)])
+    prev = np.zeros(max_len, dtype=np.uint8)
+    curr = np.zeros(max_len, dtype=np.uint8)
+    prev[:len(prev_frame_bytes)] = np.frombuffer(prev_frame_bytes, dtype=np.uint8)
+    prev_length = len(prev_frame_bytes)
+    
+    for frame_length, frame_delta in zip(frame_lengths, frame_deltas):
+        # reconstruct frame, zero-padding the previous frame up to the delta length
+        delta_len = max(prev_length, len(frame_delta))
+        prev[prev_length:delta_len] = 0
+        inverse_delta(prev[:delta_len], _padded(frame_delta, delta_len), out=curr[:delta_len])
         
-        frame_bytes = frame_bytes[:frame_length]  # remove padding
-        frames.append(frame_bytes.decode('utf-8'))
+        frame_length = min(frame_length, delta_len)  # remove padding
+        frames.append(str(curr[:frame_length].data, 'utf-8'))
         
-        prev_frame_bytes = frame_bytes
+        prev, curr = curr, prev
+        prev_length = frame_length
     
     return frames
 
 
-def encode_video_to_s4(recording: dict) -> bytes:
+def encode_video_to_s4(
+        recording: dict,
+        version: int = DEFAULT_VERSION,
+        compression: int = S4_COMPRESSION_ZLIB
+    ) -> bytes:
     """
     Encode a recording dictionary to S4 format
 
@@ -101,6 +534,7 @@ def encode_video_to_s4(recording: dict) -> bytes:
         [magic: 4 bytes]
         [version: 2 bytes]
         [checkpoint_len: 2 bytes]
+        [compression: 1 byte, from version 2]
         [checkpoint: checkpoint_len bytes]
         [action_count: 2 bytes]
         [action_space: variable]
@@ -110,58 +544,102 @@ def encode_video_to_s4(recording: dict) -> bytes:
     
     Args:
         recording: dictionary containing run information
+        version: S4 version to write, which decides how metadata and frame lengths are laid out
+        compression: how the frames are compressed, version 1 only supports zlib
 
     Return:
         byte stream containing the run data in the S4 format
     """
-    buf = io.BytesIO()
+    if version not in (S4_VERSION_RECORDS, S4_VERSION_COLUMNS):
+        raise ValueError(f"Unsupported S4 version: {version}")
+    if version == S4_VERSION_RECORDS and compression != S4_COMPRESSION_ZLIB:
+        raise ValueError("S4 version 1 only supports zlib compression")
+    
+    buf = bytearray()
     
     # header
-    magic = b'S4V1'
-    version = 1
+    magic = _MAGIC
     checkpoint = recording['checkpoint'].encode('utf-8')
     checkpoint_len = len(checkpoint)
 
-    buf.write(magic)
-    buf.write(struct.pack('<H', version))
-    buf.write(struct.pack('<H', checkpoint_len))
-    buf.write(checkpoint)
+    buf += magic
+    buf += _U16.pack(version)
+    buf += _U16.pack(checkpoint_len)
+    if version == S4_VERSION_COLUMNS:
+        buf += _U8.pack(compression)
+    buf += checkpoint
     
     # action data
-    actions = sorted(list(set([m['action'] for m in recording['metadata']])))
+    actions = sorted({m['action'] for m in recording['metadata']})
     action_to_index = {action: idx for idx, action in enumerate(actions)}
-    buf.write(struct.pack('<H', len(actions)))
+    buf += _U16.pack(len(actions))
 
     for action_name in actions:
         action_name_bytes = action_name.encode('utf-8')
-        buf.write(struct.pack('<H', len(action_name_bytes)))
-        buf.write(action_name_bytes)
+        buf += _U16.pack(len(action_name_bytes))
+        buf += action_name_bytes
 
     # frame data
-    buf.write(struct.pack('<H', len(recording['frames'])))
-    encoded_frames = delta_encode_frames(recording['frames'])
-    buf.write(struct.pack('<I', len(encoded_frames)))
-    buf.write(encoded_frames)
+    buf += _U16.pack(len(recording['frames']))
+    # frames are encoded straight into the output, their length is filled in after
+    frames_len_offset = len(buf)
+    buf += bytes(_U32.size)
+    _delta_encode_into(recording['frames'], buf, version, compression)
+    _U32.pack_into(buf, frames_len_offset, len(buf) - frames_len_offset - _U32.size)
     
     # frame metadata
-    for meta in recording['metadata']:
-        # reward data
-        reward = int(meta['reward'] * 100)  # truncate and convert to int
-        buf.write(struct.pack('<h', reward))
+    if version == S4_VERSION_COLUMNS:
+        buf += _pack_metadata_columns(recording['metadata'], action_to_index)
+        return bytes(buf)
 
-        # action
+    for meta in recording['metadata']:
+        # reward data, truncated and converted to int
+        reward = int(meta['reward'] * 100)
         action_idx = action_to_index[meta['action']]
-        buf.write(struct.pack('<B', action_idx))
-        
-        # q-values
         q_values = meta.get('q_values', [])
-        buf.write(struct.pack('<B', len(q_values)))
+        buf += _META.pack(reward, action_idx, len(q_values))
 
-        for q_val in q_values:
-            q_int = int(round(q_val * 100))
-            buf.write(struct.pack('<h', q_int))
+        if q_values:
+            buf += _q_values_struct(len(q_values)).pack(*[int(round(q_val * 100)) for q_val in q_values])
     
-    return buf.getvalue()
+    return bytes(buf)
+
+
+def _read_metadata_records(s4_data: bytes, offset: int, frame_count: int, actions: list[str]) -> list[dict]:
+    """
+    Read the per-frame metadata records one at a time
+
+    Args:
+        s4_data: byte stream of S4 video data
+        offset: position of the first metadata record
+        frame_count: number of metadata records
+        actions: the action space of the recording
+
+    Return:
+        list of per-frame metadata dictionaries
+    """
+    metadata = []
+    for _ in range(frame_count):
+        reward_int, action_idx, q_count = _META.unpack_from(s4_data, offset)
+        offset += _META.size
+        reward = reward_int / 100.0
+        action = actions[action_idx] if action_idx < len(actions) else 'ERR'
+        
+        # q_values
+        q_struct = _q_values_struct(q_count)
+        q_values = [q_int / 100.0 for q_int in q_struct.unpack_from(s4_data, offset)]
+        offset += q_struct.size
+        
+        metadata.append({
+            'reward': reward,
+            'action': action,
+            'q_values': q_values,
+            'done': False,
+            'info': {},
+            'timestep': ''
+        })
+
+    return metadata
 
 
 def decode_s4_to_video(s4_data: bytes) -> dict:
@@ -180,58 +658,48 @@ def decode_s4_to_video(s4_data: bytes) -> dict:
     Return:
         dictionary containing run information from S4 file
     """
-    stream = io.BytesIO(s4_data)
+    # fields are read in place from a view of the data, with offsets tracked by hand
+    data = memoryview(s4_data)
     
     # header
-    magic = stream.read(4)
-    if magic != b'S4V1':
-        raise ValueError(f"Invalid magic number: {magic}")
+    if len(data) < _U32.size or _U32.unpack_from(data, 0)[0] != _MAGIC_U32:
+        raise ValueError(f"Invalid magic number: {bytes(data[:4])}")
+    
+    version, checkpoint_len = _U16_PAIR.unpack_from(data, 4)
+    offset = 4 + _U16_PAIR.size
+    if version == S4_VERSION_RECORDS:
+        compression = S4_COMPRESSION_ZLIB
+    elif version == S4_VERSION_COLUMNS:
+        compression = data[offset]
+        offset += _U8.size
+    else:
+        raise ValueError(f"Unsupported S4 version: {version}")
     
-    version = struct.unpack('<H', stream.read(2))[0]
-    checkpoint_len = struct.unpack('<H', stream.read(2))[0]
-    checkpoint = stream.read(checkpoint_len).decode('utf-8')
+    checkpoint = str(data[offset:offset + checkpoint_len], 'utf-8')
+    offset += checkpoint_len
     
     # read action space
-    action_count = struct.unpack('<H', stream.read(2))[0]
+    action_count = _U16.unpack_from(data, offset)[0]
+    offset += _U16.size
     actions = []
     for _ in range(action_count):
-        action_len = struct.unpack('<H', stream.read(2))[0]
-        action = stream.read(action_len).decode('utf-8')
-        actions.append(action)
+        action_len = _U16.unpack_from(data, offset)[0]
+        offset += _U16.size
+        actions.append(str(data[offset:offset + action_len], 'utf-8'))
+        offset += action_len
     
     # frame data
-    frame_count = struct.unpack('<H', stream.read(2))[0]
-    
-    frames_len = struct.unpack('<I', stream.read(4))[0]
-    encoded_frames = stream.read(frames_len)
-    frames = delta_decode_frames(encoded_frames)
+    frame_count = _U16.unpack_from(data, offset)[0]
+    frames_len = _U32.unpack_from(data, offset + _U16.size)[0]
+    offset += _U16.size + _U32.size
+    frames = delta_decode_frames(data[offset:offset + frames_len], version, compression)
+    offset += frames_len
     
     # per-frame metadata
-    metadata = []
-    for _ in range(frame_count):
-        # reward
-        reward_int = struct.unpack('<h', stream.read(2))[0]
-        reward = reward_int / 100.0
-        
-        # action
-        action_idx = struct.unpack('<B', stream.read(1))[0]
-        action = actions[action_idx] if action_idx < len(actions) else 'ERR'
-        
-        # q_values
-        q_count = struct.unpack('<B', stream.read(1))[0]
-        q_values = []
-        for _ in range(q_count):
-            q_int = struct.unpack('<h', stream.read(2))[0]
-            q_values.append(q_int / 100.0)
-        
-        metadata.append({
-            'reward': reward,
-            'action': action,
-            'q_values': q_values,
-            'done': False,
-            'info': {},
-            'timestep': ''
-        })
+    if version == S4_VERSION_COLUMNS:
+        metadata = _read_metadata_columns(data, offset, frame_count, actions)
+    else:
+        metadata = _read_metadata_records(data, offset, frame_count, actions)
     
     metadata[-1]['done'] = True
     total_reward = sum(m['reward'] for m in metadata)
@@ -1,7 +1,9 @@
 import pickle
 import os
+import random
 import unittest
 
+from slate.video import codec
 from slate.video.codec import encode_video_to_s4, decode_s4_to_video, delta_encode_frames, delta_decode_frames
 
 
@@ -108,6 +110,67 @@ class TestCompression(unittest.TestCase):
             "Decoded frames should match original frames")
 
 
+
+    def test_s4_versions(self):
+        """
+        Test that every S4 version and compression round-trips and is read back from its header
+
+        Flow: dict -> encode with version and compression -> encoded_data -> decode -> decoded_dict
+
+        Assert:
+            the header holds the requested version
+            frame data is equal
+            reward, action and q-value metadata is equal
+        """
+        formats = [
+            (codec.S4_VERSION_RECORDS, codec.S4_COMPRESSION_ZLIB),
+            (codec.S4_VERSION_COLUMNS, codec.S4_COMPRESSION_ZLIB)
+        ]
+        if codec.zstandard is not None:
+            formats.append((codec.S4_VERSION_COLUMNS, codec.S4_COMPRESSION_ZSTD))
+
+        for version, compression in formats:
+            with self.subTest(version=version, compression=compression):
+                encoded_data = encode_video_to_s4(self.test_dict, version, compression)
+                self.assertEqual(int.from_bytes(encoded_data[4:6], 'little'), version)
+                decoded_dict = decode_s4_to_video(encoded_data)
+                self.assertEqual(
+                    self.test_dict['frames'],
+                    decoded_dict['frames'],
+                    "Decoded frames does not match original data"
+                )
+                self.assertEqual(
+                    [(frame['reward'], frame['action'], [round(q, 2) for q in frame['q_values']]) for frame in self.test_dict['metadata']],
+                    [(frame['reward'], frame['action'], frame['q_values']) for frame in decoded_dict['metadata']],
+                    "Decoded metadata does not match original data"
+                )
+        
+        with self.assertRaises(ValueError):
+            encode_video_to_s4(self.test_dict, codec.S4_VERSION_RECORDS, codec.S4_COMPRESSION_ZSTD)
+
+    def test_accumulate_xor_frames(self):
+        """
+        Test the cumulative XOR reconstruction against applying each delta in turn
+
+        Flow: frames -> per-frame XOR deltas -> _accumulate_xor_frames -> frames
+
+        Assert:
+            frames are equal for lengths that aren't a multiple of 8
+            frames are equal across more than one block of frames
+        """
+        rng = random.Random(0)
+        frame_count = 2 * codec._ACCUMULATE_BLOCK + 3
+        for frame_len in (0, 1, 13, 64):
+            with self.subTest(frame_len=frame_len):
+                frames = [''.join(rng.choice('ab .#') for _ in range(frame_len)) for _ in range(frame_count)]
+                frames_bytes = [frame.encode('utf-8') for frame in frames]
+                deltas = [
+                    bytes(prev ^ curr for prev, curr in zip(prev_frame, frame))
+                    for prev_frame, frame in zip(frames_bytes, frames_bytes[1:])
+                ]
+                self.assertEqual(codec._accumulate_xor_frames(frames_bytes[0], deltas), frames[1:])
+
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -0,0 +1,37 @@
+import unittest
+
+import torch
+
+from slate.utils import FrameBuffer
+
+
+def transform(frame: int) -> torch.Tensor:
+    return torch.full((3, 4, 4), float(frame))
+
+
+class TestFrameBuffer(unittest.TestCase):
+
+    def test_state_order(self):
+        """
+        Test that the state stacks the most recent frames from oldest to newest
+
+        Flow: reset -> append past the buffer length -> state
+
+        Assert:
+            the state has buffer_len * channels channels
+            each frame occupies its channels in arrival order
+            earlier states are not changed by later appends
+        """
+        buffer = FrameBuffer(0, 4, transform)
+        first_state = buffer.state()
+        for frame in range(1, 7):
+            buffer.append(frame)
+
+        state = buffer.state()
+        self.assertEqual(state.shape, (1, 12, 4, 4))
+        self.assertEqual([state[0, idx * 3].max().item() for idx in range(4)], [3.0, 4.0, 5.0, 6.0])
+        self.assertEqual(first_state.max().item(), 0.0, "States should not alias the buffer")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+import os
+import tempfile
+import unittest
+
+from slate.run_history import RunHistory
+
+
+def make_frame(reward: float, done: bool=False) -> dict:
+    return {
+        'frame': b'\xff\xd8frame',
+        'reward': reward,
+        'done': done,
+        'info': {},
+        'q_values': [0.25, 0.75],
+        'action': 'FIRE',
+        'checkpoint': 'model_0.pth'
+    }
+
+
+class TestRunHistory(unittest.TestCase):
+
+    def record_run(self, history: RunHistory, rewards: list[float]) -> None:
+        history.new_recording(make_frame(rewards[0]))
+        for reward in rewards[1:]:
+            history.update_recording(make_frame(reward))
+        history.stop_recording()
+
+
+    def test_fetch_after_eviction(self):
+        """
+        Test that run ids keep pointing at their own run once older runs are evicted
+
+        Flow: record more runs than max_history_size -> fetch each run id
+
+        Assert:
+            evicted run ids are no longer valid or fetched
+            remaining run ids fetch the run with the matching id
+            history metadata is ordered from oldest to newest
+        """
+        history = RunHistory(max_history_size=2)
+        for run_num in range(1, 5):
+            self.record_run(history, [float(run_num)] * run_num)
+
+        self.assertFalse(history.check_id(1), "Evicted run id should not be valid")
+        self.assertFalse(history.check_id(2), "Evicted run id should not be valid")
+        self.assertIsNone(history.fetch_recording(1), "Evicted runs should not be fetched")
+        self.assertIsNone(history.fetch_recording_frame(2, 0), "Evicted runs should not be fetched")
+
+        for run_id in (3, 4):
+            self.assertTrue(history.check_id(run_id))
+            run = history.fetch_recording(run_id)
+            self.assertEqual(run['id'], run_id, "Fetched run does not match the requested id")
+            self.assertEqual(run['total_steps'], run_id)
+
+        self.assertEqual(
+            [run['id'] for run in history.get_history_metadata()],
+            [3, 4],
+            "History metadata should list the remaining runs in order"
+        )
+
+
+    def test_recording_totals(self):
+        """
+        Test the totals and per-frame data of a stopped recording
+
+        Assert:
+            'total_steps' counts every frame
+            'total_reward' ignores negative rewards
+            per-frame rewards are preserved
+        """
+        history = RunHistory()
+        rewards = [1.0, -2.0, 0.5, 3.0]
+        self.record_run(history, rewards)
+
+        run = history.fetch_recording(1)
+        self.assertEqual(run['total_steps'], len(rewards))
+        self.assertEqual(run['total_reward'], 4.5)
+        self.assertEqual(
+            [history.fetch_recording_frame(1, idx)['reward'] for idx in range(len(rewards))],
+            rewards
+        )
+
+
+    def test_frames_without_q_values(self):
+        """
+        Test recording a checkpoint selection frame before the first step
+
+        Flow: record a frame without q-values -> record step frames -> stop -> fetch
+
+        Assert:
+            frames without q-values are read back with none
+            step frames keep all of their q-values
+        """
+        history = RunHistory()
+        history.record_frame({**make_frame(0.0), 'q_values': []})
+        history.record_frame(make_frame(1.0))
+        history.record_frame({**make_frame(0.0), 'q_values': None})
+        history.stop_recording()
+
+        self.assertEqual(
+            [frame['q_values'] for frame in history.fetch_recording(1)['metadata']],
+            [[], [0.25, 0.75], []]
+        )
+        self.assertEqual(history.fetch_recording_frame(1, 1)['q_values'], [0.25, 0.75])
+
+
+    def test_batched_q_values(self):
+        """
+        Test recording q-values shaped as a batch of one, as returned by a torch model
+
+        Assert:
+            2D q-values are flattened
+            q-values that can't be stored are read back with none
+        """
+        history = RunHistory()
+        history.record_frame({**make_frame(1.0), 'q_values': [[0.25, 0.75]]})
+        with self.assertLogs(level='WARNING'):
+            history.record_frame({**make_frame(1.0), 'q_values': [[0.25], [0.5, 0.75]]})
+        history.stop_recording()
+
+        self.assertEqual(
+            [frame['q_values'] for frame in history.fetch_recording(1)['metadata']],
+            [[0.25, 0.75], []]
+        )
+
+
+    def test_spilled_frames(self):
+        """
+        Test that spilled runs are read back from disk and evicted by size
+
+        Flow: record runs with a spill directory -> fetch frames -> record past the disk budget
+
+        Assert:
+            spilled frames match the recorded frames
+            the oldest run and its frame file are removed once the budget is exceeded
+        """
+        with tempfile.TemporaryDirectory() as spill_dir:
+            frame_size = len(make_frame(0.0)['frame'])
+            history = RunHistory(spill_dir=spill_dir, max_spill_bytes=5 * frame_size)
+
+            self.record_run(history, [1.0, 2.0, 3.0])
+            frame = history.fetch_recording_frame(1, 2)
+            self.assertEqual(frame['frame'], make_frame(0.0)['frame'])
+            self.assertEqual(frame['reward'], 3.0)
+
+            self.record_run(history, [4.0, 5.0, 6.0])
+            self.assertFalse(history.check_id(1), "Oldest run should be evicted once over the disk budget")
+            self.assertTrue(history.check_id(2))
+            self.assertEqual(os.listdir(spill_dir), ['run_2.frames'])
+
+
+    def test_spilled_frameless_update(self):
+        """
+        Test spilling a recording that starts with a frame update without a frame
+
+        Assert:
+            the frameless update is read back as an empty frame
+            the following frames are read back unchanged
+        """
+        with tempfile.TemporaryDirectory() as spill_dir:
+            history = RunHistory(spill_dir=spill_dir)
+            history.record_frame({**make_frame(0.0), 'frame': None})
+            history.record_frame(make_frame(1.0))
+            history.stop_recording()
+
+            self.assertEqual(history.fetch_recording_frame(1, 0)['frame'], b'')
+            self.assertEqual(history.fetch_recording_frame(1, 1)['frame'], make_frame(0.0)['frame'])
+
+
+if __name__ == '__main__':
+    unittest.main()